@@ -1,6 +1,7 @@
 import os
 import requests
 import ast
+from singleflight import SingleFlight
 
 class AILabEngine:
     def __init__(self):
@@ -9,9 +10,14 @@ class AILabEngine:
             self.api_key = None
         else:
             self.api_key = key
+        # Identical concurrent prompts share one upstream call
+        self._flight = SingleFlight()
 
     def generate_challenge(self, skill, proficiency='intermediate'):
         """Generate a dynamic coding challenge based on skill and proficiency"""
+        return self._flight.do(('challenge', skill, proficiency), self._generate_challenge, skill, proficiency)
+
+    def _generate_challenge(self, skill, proficiency):
         prompt = f"""Generate a coding challenge for the skill: {skill} at {proficiency} level.
         The challenge should be interactive and educational.
         
@@ -58,6 +64,9 @@ class AILabEngine:
 
     def evaluate_submission(self, challenge_title, code):
         """Evaluate the user's code submission using AI"""
+        return self._flight.do(('evaluate', challenge_title, code), self._evaluate_submission, challenge_title, code)
+
+    def _evaluate_submission(self, challenge_title, code):
         prompt = f"""Evaluate the following code submission for the challenge '{challenge_title}':
         
         Code:
@@ -107,6 +116,9 @@ class AILabEngine:
 
     def get_hint(self, challenge_title, code):
         """Get AI-driven hint based on current progress"""
+        return self._flight.do(('hint', challenge_title, code), self._get_hint, challenge_title, code)
+
+    def _get_hint(self, challenge_title, code):
         prompt = f"""The user is struggling with the coding challenge '{challenge_title}'.
         Current Code:
         {code}
@@ -1,4 +1,4 @@
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, request, jsonify, send_from_directory, g, Response, stream_with_context
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager, jwt_required, get_jwt_identity, verify_jwt_in_request
 from flask_socketio import SocketIO, emit, join_room
@@ -7,9 +7,15 @@ import io
 from dotenv import load_dotenv
 from data_engine import DataEngine
 from matcher import CareerMatcher
+from match_cache import CursorError
+from search_cache import SearchCache
+from singleflight import SingleFlight
+from skill_extractor import extract_skills, extract_skills_many
+from candidate_index import CandidateIndex
 from game_engine import GameEngine
 from ai_lab import AILabEngine
 from simulation_engine import SimulationEngine
+from timing import timings, span, server_timing_header
 from werkzeug.utils import secure_filename
 import PyPDF2
 import docx
@@ -19,6 +25,10 @@ from apscheduler.schedulers.background import BackgroundScheduler
 import firebase_admin
 from firebase_admin import credentials, auth as firebase_auth
 
+# Shard scoring workers are forked first, while the process has no other threads
+# (the database, limiter, scheduler and socket threads start below)
+shard_scorer = CareerMatcher.shard_scorer()
+
 # Import auth and database
 from auth import hash_password, verify_password, generate_token, candidate_required, company_required
 from database import (
@@ -104,6 +114,12 @@ cache_config = {
 app.config.from_mapping(cache_config)
 cache = Cache(app)
 
+# Coalesces concurrent Gemini model discovery (genai.list_models)
+model_discovery = SingleFlight()
+
+# Largest page served by cursor-paginated endpoints (?limit)
+MAX_PAGE_SIZE = 100
+
 # Rate Limiter
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
@@ -115,12 +131,31 @@ limiter = Limiter(
     storage_uri="memory://"
 )
 
+# ========== TIMING INSTRUMENTATION ==========
+# Per-stage histograms (PATHWAY_TIMINGS=1) are served by /api/metrics/timings. Any request
+# sent with 'X-Debug-Timings: 1' (or true/yes) gets its own stage timings in a Server-Timing header.
+# Streamed responses carry no server timings: headers are sent before the stream body
+# runs, so its stages only reach the histograms. Requests without spans get no header.
+@app.before_request
+def start_request_timings():
+    if request.headers.get('X-Debug-Timings', '').strip().lower() in ('1', 'true', 'yes'):
+        g.timings_token = timings.collect()
+
+@app.after_request
+def add_request_timings(response):
+    token = g.pop('timings_token', None)
+    if token is not None:
+        spans = timings.finish(token)
+        if spans and not response.is_streamed:
+            response.headers['Server-Timing'] = server_timing_header(spans)
+    return response
+
 # Initialize database
 try:
     init_db()
     
     engine = DataEngine(data_path=data_path)
-    matcher = CareerMatcher(engine)
+    matcher = CareerMatcher(engine, sharded=shard_scorer)
     game_engine = GameEngine()
     ai_lab = AILabEngine()
     sim_engine = SimulationEngine()
@@ -138,10 +173,31 @@ except Exception as e:
     app.logger.error(f"Critical Startup Error (Database): {e}")
     # Initialize dummy objects if needed so imports don't fail later
     if 'engine' not in locals(): engine = DataEngine(data_path=data_path)
-    if 'matcher' not in locals(): matcher = CareerMatcher(engine)
+    if 'matcher' not in locals(): matcher = CareerMatcher(engine, sharded=shard_scorer)
     if 'game_engine' not in locals(): game_engine = GameEngine()
     if 'ai_lab' not in locals(): ai_lab = AILabEngine()
 
+# Candidate skill index for reverse matching (new job -> candidates), kept in sync on profile writes
+candidate_index = CandidateIndex(matcher)
+try:
+    from database import candidate_profiles_collection
+    candidate_index.load(candidate_profiles_collection.find({}))
+except Exception as e:
+    app.logger.error(f"Candidate index load failed: {e}")
+CandidateProfileModel.add_listener(candidate_index.upsert)
+# Cached match results of a profile are dropped as soon as it changes
+CandidateProfileModel.add_listener(lambda profile: matcher.match_cache.invalidate_owner(profile['user_id']))
+
+# Live Muse searches are served from the cache (stale-while-revalidate), never waited on
+search_cache = SearchCache(cache, engine.fetch_jobs)
+for category in engine.MUSE_CATEGORIES:
+    search_cache.refresh(category)
+
+def _cached_search(query, location):
+    """Live jobs of a role search, or None on a cache miss (the fetch runs in the background)."""
+    with span('search_cache.get'):
+        return search_cache.get(engine.muse_category(query), location)
+
 # ========== REAL-TIME NOTIFICATION HELPERS ==========
 
 def notify_user(user_id, event_type, data):
@@ -198,10 +254,6 @@ def sync_new_jobs():
     """Background task to check for new jobs and notify relevant candidates"""
     try:
         print("Running job sync...")
-        # Get all active candidates
-        from database import candidate_profiles_collection
-        candidates = list(candidate_profiles_collection.find({}))
-        
         # Get recently added jobs (last 6 hours)
         from database import jobs_collection
         from datetime import timedelta
@@ -217,34 +269,14 @@ def sync_new_jobs():
         
         print(f"Found {len(new_jobs)} new jobs, checking matches...")
         
-        # Check each candidate against new jobs
-        for candidate in candidates:
-            profile_data = {
-                'preferred_role': candidate.get('target_role', ''),
-                'experience_level': candidate.get('experience_level', 'entry'),
-                'skills': candidate.get('skills', [])
-            }
-            
-            # Get matches
-            matches = matcher.match_user(profile_data)
-            
-            # Find new jobs in top matches
-            for match in matches[:5]:  # Top 5 matches
-                if match['readiness_score'] >= 60:  # Only notify if decent match
-                    # Check if this is a new job
-                    job_id = str(match['job_id'])
-                    if any(str(job['_id']) == job_id for job in new_jobs):
-                        # Send notification
-                        notify_new_job_match(
-                            candidate['user_id'],
-                            {
-                                'job_id': job_id,
-                                'title': match['title'],
-                                'company': match['company'],
-                                'readiness_score': match['readiness_score']
-                            }
-                        )
-                        print(f"Notified {candidate['user_id']} about {match['title']}")
+        # Reverse match: only candidates sharing skills with a new job are scored, and a
+        # job is reported when it enters their top 5 with a decent score (>= 60)
+        matches = matcher.match_new_jobs(candidate_index, [str(job['_id']) for job in new_jobs],
+                                         min_score=60, top_k=5)
+        for user_id, match in matches:
+            # Send notification
+            notify_new_job_match(user_id, match)
+            print(f"Notified {user_id} about {match['title']}")
         
         print("Job sync complete")
         
@@ -806,7 +838,8 @@ def match_resume_to_job(job_id):
                 genai.configure(api_key=google_api_key)
                 
                 # Check available models to pick the best one (prefer 2.5-flash)
-                available_models = [m.name for m in genai.list_models()]
+                # Concurrent analyses share one discovery call
+                available_models = model_discovery.do('gemini', lambda: [m.name for m in genai.list_models()])
                 if 'models/gemini-2.5-flash' in available_models:
                     model_name = 'models/gemini-2.5-flash'
                 elif 'models/gemini-1.5-flash' in available_models:
@@ -1127,7 +1160,8 @@ def get_job_recommendations():
     """
     try:
         user_id = get_jwt_identity()
-        profile = CandidateProfileModel.find_by_user_id(user_id)
+        with span('recommendations.profile'):
+            profile = CandidateProfileModel.find_by_user_id(user_id)
         
         if not profile:
             return jsonify({'error': 'Profile not found'}), 404
@@ -1136,12 +1170,30 @@ def get_job_recommendations():
         # Query The Muse API based on user's target role and location
         role_query = profile.get('target_role', 'Software Engineer')
         location_query = profile.get('location', '')
+        matcher_profile = {
+            'skills': profile.get('skills', []),
+            'experience_level': profile.get('experience_level', 'Entry Level'),
+            'preferred_role': role_query
+        }
+        
+        # Later pages are sliced from the ranked snapshot of the first one (no new fetch)
+        cursor = request.args.get('cursor')
+        if cursor:
+            scored_jobs, next_cursor, source = matcher.match_page(matcher_profile, cursor=cursor, limit=_page_limit(20))
+            return jsonify({
+                'jobs': scored_jobs,
+                'next_cursor': next_cursor,
+                'source': source,
+                'query_used': role_query
+            }), 200
         
-        live_jobs = engine.search_jobs(query=role_query, location=location_query)
+        live_jobs = _cached_search(role_query, location_query)
+        source = 'live_api' if live_jobs is not None else 'local_corpus'
         
-        # Fallback to DB if live search fails
-        if not live_jobs:
-            live_jobs = JobModel.find_active()
+        # Fallback to DB if live search fails (a cache miss ranks the local corpus instead)
+        if live_jobs == []:
+            with span('recommendations.mongo_fallback'):
+                live_jobs = JobModel.find_active()
             
         if live_jobs:
             # DataEngine already handles skill extraction now
@@ -1149,21 +1201,19 @@ def get_job_recommendations():
             
         # 2. READINESS SCORING (Phase 6)
         # Pass the live jobs to the matcher to apply the 0.7/0.2/0.1 formula
-        matcher_profile = {
-            'skills': profile.get('skills', []),
-            'experience_level': profile.get('experience_level', 'Entry Level'),
-            'preferred_role': role_query
-        }
-        
-        scored_jobs = matcher.match_user(matcher_profile, live_jobs=live_jobs)
+        scored_jobs, next_cursor, source = matcher.match_page(matcher_profile, limit=_page_limit(20),
+                                                          live_jobs=live_jobs, source=source)
         
         # 3. Return as 'jobs' for dashboard parity
         return jsonify({
-            'jobs': scored_jobs[:20], 
-            'source': 'live_api',
+            'jobs': scored_jobs, 
+            'next_cursor': next_cursor,
+            'source': source,
             'query_used': role_query
         }), 200
 
+    except CursorError as e:
+        return jsonify({'error': str(e)}), 410
     except Exception as e:
         app.logger.error(f"Recommendations error: {e}")
         return jsonify({'error': str(e)}), 500
@@ -1187,18 +1237,22 @@ def create_job():
         
         # Simple extraction if skills missing
         if not skills_input and description:
-            # Basic keyword matching placeholder
-            common = ['Python', 'Java', 'React', 'SQL']
-            skills_input = [s for s in common if s.lower() in description.lower()]
+            skills_input = extract_skills(description, fallback=False)
 
         job = JobModel.create(
             company_id=str(company_profile['_id']),
             title=title,
             description=description,
-            experience_level=data.get('experience_level', 'entry'),
+            requirements=skills_input,
+            salary_range=data.get('salary_range', ''),
             location=data.get('location', ''),
-            skills=skills_input
+            job_type=data.get('job_type', 'full-time'),
+            experience_level=data.get('experience_level', 'entry')
         )
+        
+        # Make the posting matchable immediately (no retrain)
+        job['company_name'] = company_profile.get('company_name')
+        matcher.add_job(job)
         return jsonify({'message': 'Job posted', 'job_id': str(job['_id'])}), 201
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -1218,69 +1272,116 @@ def get_company_jobs():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def _search_jobs_and_profile(query, location):
+    """
+    Live jobs for a search (The Muse, falling back to active MongoDB jobs) with sanitized
+    skills, and the matcher profile of the signed-in candidate (None when anonymous).
+    On a search cache miss signed-in candidates get live_jobs=None, i.e. the matcher
+    ranks the local corpus.
+    """
+    matcher_profile = _search_profile(query)
+    return _search_live_jobs(query, location, corpus_fallback=bool(matcher_profile)), matcher_profile
+
+def _search_live_jobs(query, location, corpus_fallback=False):
+    # 1. Fetch Jobs
+    live_jobs = _cached_search(query, location)
+    if live_jobs is None and corpus_fallback:
+        return None
+    if not live_jobs:
+        live_jobs = JobModel.find_active()
+        
+    # 2. Extract skills only for jobs without them (e.g. Mongo postings); cached live jobs
+    # already carry DataEngine's skills and are shared, so they are copied, never modified
+    missing = [i for i, job in enumerate(live_jobs or []) if not job.get('mapped_skills')]
+    if missing:
+        live_jobs = list(live_jobs)
+        descriptions = [live_jobs[i].get('full_description') or live_jobs[i].get('description', '') for i in missing]
+        for i, skills in zip(missing, extract_skills_many(descriptions)):
+            live_jobs[i] = dict(live_jobs[i], mapped_skills=skills)
+    return live_jobs
+
+def _search_profile(query):
+    # 3. Match User (if logged in)
+    user_id = None
+    try:
+        verify_jwt_in_request(optional=True)
+        user_id = get_jwt_identity()
+    except Exception as e:
+        with open("backend_debug.log", "a") as f: f.write(f"DEBUG: JWT Verify Error: {str(e)}\n")
+        pass
+
+    matcher_profile = None
+    if user_id:
+        profile = CandidateProfileModel.find_by_user_id(user_id)
+        if profile:
+            matcher_profile = {
+                'skills': profile.get('skills', []),
+                'experience_level': profile.get('experience_level', 'Entry Level'),
+                'preferred_role': profile.get('target_role', query)
+            }
+    return matcher_profile
+
+def _page_limit(default):
+    """?limit for paginated endpoints, clamped to [1, MAX_PAGE_SIZE]."""
+    return min(max(request.args.get('limit', default, type=int), 1), MAX_PAGE_SIZE)
+
 @app.route('/api/jobs/search', methods=['GET'])
 def search_jobs():
     try:
         # Get query parameters
         query = request.args.get('query', 'Software Engineering')
         location = request.args.get('location', '')
-        
-        # 1. Fetch Jobs
-        live_jobs = engine.search_jobs(query, location)
-        if not live_jobs:
-            live_jobs = JobModel.find_active()
-            
-        # 2. SANITIZE SKILLS (Fix for Stale DataEngine)
-        import re
-        def sanitize_skills(text):
-            found = set()
-            keywords = {
-                'Python': ['python'], 'Java': ['java', 'jvm'], 'JavaScript': ['javascript', 'js'],
-                'React': ['react'], 'Node.js': ['node'], 'SQL': ['sql'], 'AWS': ['aws'],
-                'Docker': ['docker'], 'Communication': ['communication'], 'Teamwork': ['teamwork'],
-                'Data Analysis': ['analysis', 'data'], 'Design': ['design', 'figma'],
-                'Software Engineering': ['software', 'developer', 'engineer']
-            }
-            text_lower = (text or '').lower()
-            for skill, patterns in keywords.items():
-                for pat in patterns:
-                    if re.search(r'\b' + re.escape(pat) + r'\b', text_lower):
-                        found.add(skill)
-                        break
-            if not found: found.add('Communication')
-            return list(found)
-
-        if live_jobs:
-            for job in live_jobs:
-                desc = job.get('full_description') or job.get('description', '')
-                job['mapped_skills'] = sanitize_skills(desc)
-
-        # 3. Match User (if logged in)
-        user_id = None
-        try:
-            verify_jwt_in_request(optional=True)
-            user_id = get_jwt_identity()
-        except Exception as e:
-            with open("backend_debug.log", "a") as f: f.write(f"DEBUG: JWT Verify Error: {str(e)}\n")
-            pass
-
-        if user_id:
-            profile = CandidateProfileModel.find_by_user_id(user_id)
-            if profile:
-                matcher_profile = {
-                    'skills': profile.get('skills', []),
-                    'experience_level': profile.get('experience_level', 'Entry Level'),
-                    'preferred_role': profile.get('target_role', query)
-                }
-                scored_jobs = matcher.match_user(matcher_profile, live_jobs=live_jobs)
-                return jsonify({'jobs': scored_jobs}), 200
-        
+        cursor = request.args.get('cursor')
+        paginate = cursor or 'limit' in request.args
+        
+        # Later pages are sliced from the ranked snapshot of the first one (no new fetch)
+        if cursor:
+            matcher_profile = _search_profile(query)
+            if matcher_profile:
+                scored_jobs, next_cursor, _ = matcher.match_page(matcher_profile, cursor=cursor, limit=_page_limit(20))
+                return jsonify({'jobs': scored_jobs, 'next_cursor': next_cursor}), 200
+        
+        live_jobs, matcher_profile = _search_jobs_and_profile(query, location)
+        if matcher_profile:
+            if paginate:
+                scored_jobs, next_cursor, _ = matcher.match_page(matcher_profile, limit=_page_limit(20), live_jobs=live_jobs)
+                return jsonify({'jobs': scored_jobs, 'next_cursor': next_cursor}), 200
+            scored_jobs = matcher.match_user(matcher_profile, live_jobs=live_jobs)
+            return jsonify({'jobs': scored_jobs}), 200
+        
+        # Anonymous searches are not ranked and always return every job
         return jsonify({'jobs': live_jobs}), 200
 
+    except CursorError as e:
+        return jsonify({'error': str(e)}), 410
     except Exception as e:
         app.logger.error(f"Search jobs error: {e}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/jobs/search/stream', methods=['GET'])
+def search_jobs_stream():
+    """Streaming /api/jobs/search: jobs in rank order for signed-in candidates."""
+    try:
+        query = request.args.get('query', 'Software Engineering')
+        location = request.args.get('location', '')
+        limit, min_score = _stream_args()
+        live_jobs, matcher_profile = _search_jobs_and_profile(query, location)
+    except Exception as e:
+        app.logger.error(f"Search jobs stream error: {e}")
+        return jsonify({'error': str(e)}), 500
+
+    def events():
+        if matcher_profile:
+            jobs = matcher.iter_matches(matcher_profile, live_jobs=live_jobs, limit=limit, min_score=min_score)
+        else:
+            jobs = iter(live_jobs[:limit])
+        count = 0
+        for job in jobs:
+            count += 1
+            yield 'match', {'rank': count, 'job': job}
+        yield 'done', {'count': count}
+    return _stream_events(events())
+
 
 # ========== APPLICATION ENDPOINTS ==========
 
@@ -1356,10 +1457,9 @@ def apply_to_job(job_id):
             'experience_level': profile.get('experience_level', 'entry'),
             'skills': profile.get('skills', [])
         }
-        matches = matcher.match_user(profile_data)
-        job_match = next((m for m in matches if str(m.get('job_id')) == str(job_id)), None)
-        
-        # If not found in recommendations, try fetching directly
+        job_match = matcher.match_job(profile_data, job_id)
+
+        # If not in the job index, score the posting directly
         if not job_match:
             try:
                 job_doc = JobModel.find_by_id(job_id)
@@ -1418,50 +1518,124 @@ def analyze():
     Analyze user profile and match with jobs.
     """
     try:
-        # Try auth using global imports
-        user_id = None
-        try:
-            verify_jwt_in_request(optional=True)
-            user_id = get_jwt_identity()
-        except: pass
-        
-        if user_id:
-            profile = CandidateProfileModel.find_by_user_id(user_id)
-            if not profile: return jsonify({'error': 'Profile not found'}), 404
+        user_id, profile_data = _analysis_profile()
+        if profile_data is None:
+            return jsonify({'error': 'Profile not found'}), 404
             
-            profile_data = {
-                'preferred_role': profile.get('target_role', ''),
-                'experience_level': profile.get('experience_level', 'entry'),
-                'skills': profile.get('skills', [])
-            }
+        # ?limit / ?cursor page through the whole ranking instead of the top 10
+        cursor = request.args.get('cursor')
+        next_cursor = None
+        if cursor or 'limit' in request.args:
+            results, next_cursor, _ = matcher.match_page(profile_data, cursor=cursor, limit=_page_limit(10))
         else:
-            profile_data = request.json
-            
-        results = matcher.match_user(profile_data)
+            results = matcher.match_user(profile_data, top_k=10, user_id=user_id)
         
         # Analysis summary
-        avg_readiness = sum(r['readiness_score'] for r in results) / len(results) if results else 0
-        
-        # Missing skills
-        from collections import Counter
-        all_missing = []
-        for job in results[:5]:
-            all_missing.extend(job.get('missing_skills', []))
-        critical = [s for s, c in Counter(all_missing).most_common(5)]
+        avg_readiness = matcher.average_readiness(profile_data, user_id=user_id)
         
-        return jsonify({
+        response = {
             'readiness_score': round(avg_readiness, 1),
-            'top_matches': results[:10],
+            'top_matches': results,
             'analysis': {
                 'summary': "Analysis Complete",
-                'missing_critical_skills': critical
+                'missing_critical_skills': _critical_gaps(results)
             }
-        })
+        }
+        if next_cursor or cursor or 'limit' in request.args:
+            response['next_cursor'] = next_cursor
+        return jsonify(response)
         
+    except CursorError as e:
+        return jsonify({'error': str(e)}), 410
     except Exception as e:
         print(f"Analyze error: {e}")
         return jsonify({'error': str(e)}), 500
 
+def _analysis_profile():
+    """(user_id, matcher profile) for /api/analyze: the signed-in candidate's profile, else the posted one."""
+    # Try auth using global imports
+    user_id = None
+    try:
+        verify_jwt_in_request(optional=True)
+        user_id = get_jwt_identity()
+    except: pass
+    
+    if user_id:
+        profile = CandidateProfileModel.find_by_user_id(user_id)
+        if not profile: return user_id, None
+        
+        return user_id, {
+            'preferred_role': profile.get('target_role', ''),
+            'experience_level': profile.get('experience_level', 'entry'),
+            'skills': profile.get('skills', [])
+        }
+    return user_id, request.json
+
+def _critical_gaps(results):
+    """Most frequent missing skills in the top 5 matches, ties broken by corpus-wide demand."""
+    from collections import Counter
+    all_missing = []
+    for job in results[:5]:
+        all_missing.extend(job.get('missing_skills', []))
+    demand = matcher.job_index.demand.counts if matcher.job_index is not None else {}
+    gap_counts = Counter(all_missing)
+    return sorted(gap_counts, key=lambda s: (-gap_counts[s], -demand.get(s, 0)))[:5]
+
+# ========== STREAMING ENDPOINTS ==========
+# Ranked matches are sent as they are built (best first) instead of one JSON document:
+# NDJSON lines {"type": ..., ...} by default, Server-Sent Events with ?format=sse or
+# 'Accept: text/event-stream'. Optional ?limit=N and ?min_score=S.
+
+def _stream_events(events):
+    """Streaming response for a generator of (event type, data dict)."""
+    sse = request.args.get('format') == 'sse' or 'text/event-stream' in request.headers.get('Accept', '')
+
+    def generate():
+        try:
+            for event, data in events:
+                if sse:
+                    yield f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+                else:
+                    yield json.dumps(dict(data, type=event), default=str) + "\n"
+        except Exception as e:
+            app.logger.error(f"Stream error: {e}")
+            error = {'error': str(e)}
+            yield f"event: error\ndata: {json.dumps(error)}\n\n" if sse else json.dumps(dict(error, type='error')) + "\n"
+
+    return Response(stream_with_context(generate()),
+                    mimetype='text/event-stream' if sse else 'application/x-ndjson',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+def _stream_args():
+    limit = request.args.get('limit', type=int)
+    min_score = request.args.get('min_score', type=float)
+    return (limit if limit is None or limit >= 0 else None), min_score
+
+@app.route('/api/analyze/stream', methods=['POST'])
+def analyze_stream():
+    """Streaming /api/analyze: summary, then every match in rank order, then the gap analysis."""
+    try:
+        user_id, profile_data = _analysis_profile()
+        if profile_data is None:
+            return jsonify({'error': 'Profile not found'}), 404
+        limit, min_score = _stream_args()
+        avg_readiness = matcher.average_readiness(profile_data, user_id=user_id)
+    except Exception as e:
+        print(f"Analyze stream error: {e}")
+        return jsonify({'error': str(e)}), 500
+
+    def events():
+        yield 'summary', {'readiness_score': round(avg_readiness, 1)}
+        head, count = [], 0
+        for job in matcher.iter_matches(profile_data, limit=limit, min_score=min_score):
+            count += 1
+            if len(head) < 5:
+                head.append(job)
+            yield 'match', {'rank': count, 'job': job}
+        yield 'done', {'count': count, 'analysis': {'summary': "Analysis Complete",
+                                                    'missing_critical_skills': _critical_gaps(head)}}
+    return _stream_events(events())
+
 @app.route('/api/simulate', methods=['POST'])
 def simulate_skill_impact():
     try:
@@ -1492,9 +1666,10 @@ def simulate_skill_impact():
                 print(f"Targeted simulation for DB job: {target_id}")
                 matches = matcher.match_user(sim_profile, live_jobs=[job_data])
             else:
-                # 3. Fallback to search in local cache (CSV jobs)
+                # 3. Fallback to the indexed corpus: only the target job is rescored
                 print(f"Fallback simulation in local cache for: {target_id}")
-                matches = matcher.match_user(sim_profile)
+                job_match = matcher.what_if(data['profile'], data['add_skill'], target_id)
+                matches = [job_match] if job_match else []
         
         job = next((j for j in matches if str(j['job_id']) == target_id), None)
         
@@ -1517,6 +1692,67 @@ def simulate_skill_impact():
         traceback.print_exc()
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/simulate/skill-gains', methods=['POST'])
+def simulate_skill_gains():
+    """
+    Rank the user's missing skills by total readiness gain across their top jobs.
+    """
+    try:
+        user_id = None
+        try:
+            verify_jwt_in_request(optional=True)
+            user_id = get_jwt_identity()
+        except: pass
+        
+        data = request.json or {}
+        if user_id:
+            profile = CandidateProfileModel.find_by_user_id(user_id)
+            if not profile: return jsonify({'error': 'Profile not found'}), 404
+            
+            profile_data = {
+                'preferred_role': profile.get('target_role', ''),
+                'experience_level': profile.get('experience_level', 'entry'),
+                'skills': profile.get('skills', [])
+            }
+        elif 'profile' in data:
+            profile_data = data['profile']
+        else:
+            return jsonify({'error': 'Missing profile'}), 400
+        
+        try:
+            top_n = int(data.get('top_n', 10))
+        except (TypeError, ValueError):
+            return jsonify({'error': 'top_n must be an integer'}), 400
+        top_n = min(max(top_n, 1), 100)
+        gains = matcher.rank_skill_gains(profile_data, top_n=top_n)
+        
+        return jsonify({
+            'top_n': top_n,
+            'skills': gains,
+            'next_skill': gains[0]['skill'] if gains else None
+        })
+        
+    except Exception as e:
+        print(f"Skill gains error: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/skills/demand', methods=['GET'])
+def get_skill_demand():
+    """
+    Skill demand across the job corpus, optionally for one role cluster, one experience
+    level, or both. Unknown clusters or levels are a 400.
+    """
+    try:
+        cluster = request.args.get('cluster')
+        level = request.args.get('level')
+        top = min(max(request.args.get('top', 20, type=int), 1), 200)
+        return jsonify(matcher.skill_demand(cluster=cluster, level=level, top=top))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        print(f"Skill demand error: {e}")
+        return jsonify({'error': str(e)}), 500
+
 # ========== SIMULATION ENDPOINTS ==========
 
 @app.route('/api/simulations/recommendation', methods=['GET'])
@@ -1551,7 +1787,7 @@ def get_simulation_recommendation():
             'experience_level': profile.get('experience_level', 'entry'),
             'skills': profile.get('skills', [])
         }
-        results = matcher.match_user(profile_data)
+        results = matcher.match_user(profile_data, top_k=1, user_id=user_id)
         # Mocking generic readiness if no specific job match found
         current_readiness = results[0]['readiness_score'] if results else 85.0
 
@@ -1744,6 +1980,15 @@ def health():
         "timestamp": datetime.utcnow().isoformat()
     })
 
+@app.route('/api/metrics/timings', methods=['GET'])
+@limiter.exempt
+def timing_metrics():
+    """Per-stage latency histograms (enable with PATHWAY_TIMINGS=1)."""
+    return jsonify({
+        'enabled': timings.enabled,
+        'stages': timings.snapshot()
+    }), 200
+
 @app.route('/api/test_reload', methods=['GET'])
 def test_reload():
     return jsonify({"message": "Reloaded!"}), 200
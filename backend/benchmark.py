@@ -0,0 +1,223 @@
+"""
+Matcher micro-benchmarks over seeded synthetic corpora.
+
+Times CareerMatcher.train(), match_user, match_many, calculate_skill_score and
+DataEngine._extract_skills_from_text for growing corpus sizes, records the peak traced
+memory of each stage and writes everything as JSON so runs can be diffed across commits.
+
+    python benchmark.py --sizes 1000,10000 --output bench.json
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from data_engine import DataEngine
+from matcher import CareerMatcher
+from ml_engine import MockDataGenerator
+
+SIZES = (1_000, 10_000, 100_000, 1_000_000)
+SEED = 42
+PROFILES = 20
+TOP_K = 20
+# Work per stage is capped so that large corpora still finish in reasonable time
+SKILL_SCORE_JOBS = 2_000
+EXTRACTION_TEXTS = 5_000
+LOCATIONS = ['Remote', 'New York, NY', 'San Francisco, CA', 'London, UK', 'Austin, TX']
+
+
+class SyntheticDataEngine(DataEngine):
+    """DataEngine serving n seeded synthetic jobs built from the mock job templates."""
+    def __init__(self, n, seed=SEED, data_path=None):
+        super().__init__(data_path=data_path or tempfile.mkdtemp(prefix='pathway_bench_'))
+        self.n = n
+        self.seed = seed
+
+    def source_fingerprint(self):
+        return f"synthetic:{self.n}:{self.seed}"
+
+    def role_templates(self):
+        """(title, department, skills) of the mock seed jobs."""
+        random.seed(self.seed)
+        templates = {}
+        for job in self._generate_mock_jobs():
+            department = job['company_name'].rsplit(' Corp', 1)[0]
+            templates[job['title']] = (job['title'], department, job['mapped_skills'])
+        return sorted(templates.values())
+
+    def load_data(self, samples=None, columns=None):
+        rnd = random.Random(self.seed)
+        templates = self.role_templates()
+        extra_skills = MockDataGenerator().skills_pool
+        levels = list(CareerMatcher.EXPERIENCE_LEVELS)
+
+        columns = {name: [] for name in ('job_id', 'title', 'company_name', 'location', 'description',
+                                         'formatted_experience_level', 'mapped_skills', 'salary_disp')}
+        for i in range(self.n):
+            title, department, skills = rnd.choice(templates)
+            skills = rnd.sample(skills, rnd.randint(1, len(skills))) + rnd.sample(extra_skills, rnd.randint(0, 2))
+            columns['job_id'].append(f'bench_{i}')
+            columns['title'].append(title)
+            columns['company_name'].append(f"{department} Corp {i % 997}")
+            columns['location'].append(rnd.choice(LOCATIONS))
+            columns['description'].append(
+                f"We are looking for a {title} to join our {department} team. You will use {', '.join(skills)}.")
+            columns['formatted_experience_level'].append(rnd.choice(levels))
+            columns['mapped_skills'].append(list(dict.fromkeys(skills)))
+            columns['salary_disp'].append(f"${rnd.randint(60, 150)}k/year")
+
+        df = pd.DataFrame(columns)
+        df['is_active'] = True
+        df['search_text'] = (df['title'] + " " + df['company_name'] + " " + df['description']).str.lower()
+        return df
+
+
+def synthetic_profiles(engine, count=PROFILES, seed=SEED):
+    """Seeded candidate profiles (mixed string / dict skills, levels and preferred roles)."""
+    rnd = random.Random(seed + 1)
+    templates = engine.role_templates()
+    pool = sorted({s for _, _, skills in templates for s in skills} | set(MockDataGenerator().skills_pool))
+    proficiencies = ['beginner', 'intermediate', 'advanced', 'expert']
+    profiles = []
+    for _ in range(count):
+        skills = []
+        for skill in rnd.sample(pool, rnd.randint(0, 8)):
+            skills.append({'name': skill, 'proficiency': rnd.choice(proficiencies)} if rnd.random() < 0.5 else skill)
+        profiles.append({
+            'skills': skills,
+            'experience_level': rnd.choice(list(CareerMatcher.EXPERIENCE_LEVELS)),
+            'preferred_role': rnd.choice(templates)[0] if rnd.random() < 0.8 else ''
+        })
+    return profiles
+
+
+def measure(fn, repeat=3):
+    """
+    Runs fn `repeat` times untraced for timings, then once under tracemalloc for the peak
+    of memory allocated during the call. Returns (timing stats, peak MB, last result).
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    stats = {'min': min(timings), 'median': statistics.median(timings), 'mean': statistics.mean(timings)}
+    return stats, peak / 2 ** 20, result
+
+
+def bench_size(n, repeat=3, seed=SEED):
+    """All stages for one corpus size: list of result dicts."""
+    engine = SyntheticDataEngine(n, seed)
+    results = []
+
+    def record(stage, fn, ops=1, stage_repeat=repeat):
+        seconds, peak_mb, result = measure(fn, stage_repeat)
+        results.append({'jobs': n, 'stage': stage, 'ops': ops, 'seconds': seconds,
+                        'per_op_ms': seconds['median'] / ops * 1000, 'peak_mb': round(peak_mb, 2)})
+        print(f"  {stage:<24} {seconds['median']:.4f}s  peak {peak_mb:.1f} MB", file=sys.stderr)
+        return result
+
+    matcher = None
+    try:
+        matcher = CareerMatcher(engine, sharded=CareerMatcher.shard_scorer())
+
+        def train():
+            random.seed(seed)
+            np.random.seed(seed)
+            matcher.train(use_snapshot=False)
+        record('train', train, stage_repeat=1)
+        record('save_snapshot', lambda: matcher.save_snapshot(matcher.source_fingerprint()), stage_repeat=1)
+        record('load_snapshot', lambda: matcher.train(use_snapshot=True), stage_repeat=1)
+        matcher.match_cache.max_entries = 0
+
+        profiles = synthetic_profiles(engine, seed=seed)
+
+        def match_each(**kwargs):
+            for profile in profiles:
+                matcher.match_cache.clear()
+                matcher.match_user(profile, **kwargs)
+        record('match_user_top_k', lambda: match_each(top_k=TOP_K), ops=len(profiles))
+        record('match_user_min_score', lambda: match_each(top_k=TOP_K, min_score=60), ops=len(profiles))
+        record('match_many_top_k', lambda: matcher.match_many(profiles, top_k=TOP_K), ops=len(profiles))
+        record('average_readiness', lambda: [matcher.match_cache.clear() or matcher.average_readiness(p)
+                                             for p in profiles], ops=len(profiles))
+
+        df = engine.load_data()
+        jobs = df['mapped_skills'].tolist()[:SKILL_SCORE_JOBS]
+        record('calculate_skill_score', lambda: [matcher.calculate_skill_score(profiles[i % len(profiles)]['skills'], skills)
+                                                 for i, skills in enumerate(jobs)], ops=len(jobs))
+
+        texts = df['description'].tolist()[:EXTRACTION_TEXTS]
+        record('extract_skills', lambda: [engine._extract_skills_from_text(text) for text in texts], ops=len(texts))
+    finally:
+        if matcher is not None and matcher.sharded is not None:
+            matcher.sharded.close()
+        shutil.rmtree(engine.data_path, ignore_errors=True)
+    return results
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(sizes=SIZES, repeat=3, seed=SEED):
+    report = {
+        'meta': {
+            'commit': _git_commit(),
+            'timestamp': datetime.utcnow().isoformat() + 'Z',
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'shard_workers': CareerMatcher.SHARD_WORKERS,
+            'seed': seed,
+            'repeat': repeat,
+        },
+        'results': []
+    }
+    # Training and loading log to stdout; keep it free for the report
+    with contextlib.redirect_stdout(sys.stderr):
+        for n in sizes:
+            print(f"Benchmarking {n} jobs...")
+            report['results'].extend(bench_size(n, repeat, seed))
+    return report
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', default=','.join(str(n) for n in SIZES),
+                        help='comma separated corpus sizes (default: %(default)s)')
+    parser.add_argument('--repeat', type=int, default=3, help='timed runs per stage (training runs once)')
+    parser.add_argument('--seed', type=int, default=SEED)
+    parser.add_argument('--output', help='write the JSON report here instead of stdout')
+    args = parser.parse_args()
+
+    report = run([int(n) for n in args.sizes.split(',')], args.repeat, args.seed)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {args.output}", file=sys.stderr)
+    else:
+        print(json.dumps(report, indent=2))
@@ -0,0 +1,111 @@
+import threading
+import weakref
+
+
+class CandidateIndex:
+    """
+    Inverted index of candidate profiles by normalized skill, used for reverse matching
+    (new job -> candidates who could be interested, see CareerMatcher.match_new_jobs).
+    Also caches each candidate's current top matches as (rows, scores) of a job index.
+    Kept in sync with profile writes through CandidateProfileModel listeners.
+    """
+    def __init__(self, matcher):
+        self.matcher = matcher
+        self._profiles = {}     # user_id -> matcher profile dict
+        self._skill_maps = {}   # user_id -> {normalized skill: confidence}
+        self._skill_users = {}  # normalized skill -> set of user_ids
+        self._top = {}          # user_id -> (rows covered, top rows, top scores, min score)
+        self._top_index = None  # weakref to the job index the cached tops were computed on
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def profile_data(candidate):
+        """Candidate profile document -> matcher profile (same mapping as sync_new_jobs)."""
+        return {
+            'preferred_role': candidate.get('target_role', ''),
+            'experience_level': candidate.get('experience_level', 'entry'),
+            'skills': candidate.get('skills', [])
+        }
+
+    def load(self, candidates):
+        for candidate in candidates:
+            self.upsert(candidate)
+        return self
+
+    def upsert(self, candidate):
+        """Adds or re-indexes a candidate profile document (drops its cached top matches)."""
+        if not candidate or not candidate.get('user_id'):
+            return
+        user_id = str(candidate['user_id'])
+        profile = self.profile_data(candidate)
+        skill_map = self.matcher.build_user_skill_map(profile['skills'] or [])
+        with self._lock:
+            self._unlink(user_id)
+            self._profiles[user_id] = profile
+            self._skill_maps[user_id] = skill_map
+            for skill in skill_map:
+                self._skill_users.setdefault(skill, set()).add(user_id)
+
+    def remove(self, user_id):
+        with self._lock:
+            self._unlink(str(user_id))
+
+    def _unlink(self, user_id):
+        for skill in self._skill_maps.pop(user_id, {}):
+            users = self._skill_users.get(skill)
+            if users is not None:
+                users.discard(user_id)
+                if not users:
+                    del self._skill_users[skill]
+        self._profiles.pop(user_id, None)
+        self._top.pop(user_id, None)
+
+    def users_with_skill(self, skill):
+        with self._lock:
+            return set(self._skill_users.get(skill, ()))
+
+    def user_ids(self):
+        with self._lock:
+            return set(self._profiles)
+
+    def profiles(self, user_ids):
+        """{user_id: (profile, skill_map)} for the given users still indexed."""
+        with self._lock:
+            return {u: (self._profiles[u], self._skill_maps[u]) for u in user_ids if u in self._profiles}
+
+    def cached_top(self, user_id, index, min_score=None):
+        """
+        (rows, scores, rows covered) of the cached top matches, or None if they were computed
+        on another index, one of their rows was removed since, or they only kept scores
+        above a higher min_score.
+        """
+        with self._lock:
+            entry = self._tops(index).get(user_id)
+        if entry is None or not index.active[entry[1]].all():
+            return None
+        upto, rows, scores, floor = entry
+        if floor is not None and (min_score is None or floor > min_score):
+            return None
+        return rows, scores, upto
+
+    def set_top(self, user_id, profile, index, upto, rows, scores, min_score=None):
+        """
+        Caches top matches computed for a profile (ignored if the profile changed meanwhile).
+        min_score: the matches only rank jobs at or above this score.
+        """
+        with self._lock:
+            if self._profiles.get(user_id) is profile:
+                self._tops(index)[user_id] = (upto, rows, scores, min_score)
+
+    def _tops(self, index):
+        """
+        Cached tops of an index. A different index (retrain, compaction) drops all entries;
+        only a weak reference to the index is kept, so a retired index is never held alive.
+        """
+        if self._top_index is None or self._top_index() is not index:
+            self._top.clear()
+            self._top_index = weakref.ref(index)
+        return self._top
+
+    def __len__(self):
+        return len(self._profiles)
@@ -0,0 +1,147 @@
+import json
+import os
+import time
+import numpy as np
+import pandas as pd
+from disk_store import load_array, save_directory
+
+# Bump when the on-disk layout changes
+FORMAT_VERSION = 1
+
+
+class CorpusStore:
+    """
+    Processed job corpus persisted as NumPy column files, one directory per fingerprint:
+
+        <root>/<fingerprint>/manifest.json       rows, column kinds, creation time, extras
+        <root>/<fingerprint>/<column>.*.npy      one set of files per column
+
+    Column kinds: 'bool' and 'number' are plain arrays; 'str' is the UTF-8 bytes of all
+    values plus int64 offsets; 'list' (lists of strings, e.g. mapped_skills) adds per-row
+    offsets into a 'str' item column. Missing values are kept in a '<column>.null.npy' mask.
+    Files are memory-mapped on load and only the requested columns are opened, so
+    loading titles and skills never reads the descriptions.
+    """
+    def __init__(self, root):
+        self.root = root
+
+    def manifest(self, fingerprint):
+        """Manifest of a stored corpus, or None if missing or of another format version."""
+        try:
+            with open(os.path.join(self.root, fingerprint, 'manifest.json')) as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if manifest.get('version') != FORMAT_VERSION or manifest.get('fingerprint') != fingerprint:
+            return None
+        return manifest
+
+    def save(self, df, fingerprint, **extra):
+        """
+        Writes df under its fingerprint (temporary directory renamed into place) and removes
+        corpora of other fingerprints. Returns False if writing failed.
+        """
+        def write(path):
+            kinds = {}
+            for name in df.columns:
+                kinds[name] = _write_column(path, str(name), df[name])
+            manifest = dict(extra, version=FORMAT_VERSION, fingerprint=fingerprint, created_at=time.time(),
+                            rows=len(df), columns=kinds)
+            with open(os.path.join(path, 'manifest.json'), 'w') as f:
+                json.dump(manifest, f)
+
+        return save_directory(self.root, fingerprint, write, 'processed corpus')
+
+    def load(self, fingerprint, columns=None):
+        """
+        DataFrame of a stored corpus (optionally only some columns; unknown names are
+        skipped), or None if there is no valid corpus for the fingerprint.
+        """
+        manifest = self.manifest(fingerprint)
+        if manifest is None:
+            return None
+        path = os.path.join(self.root, fingerprint)
+        kinds = manifest['columns']
+        names = [c for c in columns if c in kinds] if columns is not None else list(kinds)
+        try:
+            data = {name: _read_column(path, name, kinds[name], manifest['rows']) for name in names}
+        except (OSError, ValueError) as e:
+            print(f"Could not load processed corpus: {e}")
+            return None
+        return pd.DataFrame(data, index=pd.RangeIndex(manifest['rows']))
+
+
+def _column_kind(series):
+    if pd.api.types.is_bool_dtype(series.dtype):
+        return 'bool'
+    if pd.api.types.is_numeric_dtype(series.dtype):
+        return 'number'
+    values = series[series.map(_present)]
+    if len(values) and values.map(lambda v: isinstance(v, (list, tuple))).all():
+        return 'list'
+    if len(values) and values.map(lambda v: isinstance(v, (bool, np.bool_))).all():
+        return 'bool'
+    return 'str'
+
+
+def _present(value):
+    return isinstance(value, (list, tuple)) or not pd.isna(value)
+
+
+def _write_column(path, name, series):
+    kind = _column_kind(series)
+    prefix = os.path.join(path, name)
+    present = series.map(_present).to_numpy(dtype=np.bool_)
+    if not present.all():
+        np.save(f"{prefix}.null.npy", ~present)
+
+    if kind == 'number':
+        np.save(f"{prefix}.values.npy", series.to_numpy())
+    elif kind == 'bool':
+        np.save(f"{prefix}.values.npy", np.array([bool(v) if p else False for v, p in zip(series, present)]))
+    elif kind == 'str':
+        _write_strings(prefix, [str(v) if p else '' for v, p in zip(series, present)])
+    else:
+        rows = [list(v) if p else [] for v, p in zip(series, present)]
+        offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(items) for items in rows])
+        np.save(f"{prefix}.rows.npy", offsets)
+        _write_strings(f"{prefix}.items", [str(item) for items in rows for item in items])
+    return kind
+
+
+def _write_strings(prefix, values):
+    encoded = [value.encode('utf-8') for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(value) for value in encoded])
+    np.save(f"{prefix}.offsets.npy", offsets)
+    np.save(f"{prefix}.bytes.npy", np.frombuffer(b''.join(encoded), dtype=np.uint8))
+
+
+def _read_column(path, name, kind, rows):
+    prefix = os.path.join(path, name)
+    null = np.load(f"{prefix}.null.npy") if os.path.exists(f"{prefix}.null.npy") else None
+
+    if kind == 'number':
+        values = load_array(f"{prefix}.values.npy")
+        return np.array(values) if null is None else np.where(null, np.nan, values)
+    if kind == 'bool':
+        values = np.load(f"{prefix}.values.npy")
+        if null is None:
+            return values
+        return np.array([None if n else bool(v) for v, n in zip(values, null)], dtype=object)
+    if kind == 'str':
+        values = _read_strings(prefix)
+    else:
+        items = _read_strings(f"{prefix}.items")
+        offsets = load_array(f"{prefix}.rows.npy").tolist()
+        values = [items[offsets[i]:offsets[i + 1]] for i in range(rows)]
+    if null is not None:
+        values = [None if n else v for v, n in zip(values, null)]
+    return values
+
+
+def _read_strings(prefix):
+    offsets = load_array(f"{prefix}.offsets.npy").tolist()
+    raw = load_array(f"{prefix}.bytes.npy").tobytes()
+    return [raw[offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(len(offsets) - 1)]
@@ -1,16 +1,61 @@
 import pandas as pd
 import os
 import ast
-import requests
 import re
+import hashlib
+import json
+import time
+from corpus_store import CorpusStore
+from muse_client import MuseClient
+from skill_extractor import context_fallback, extract_skills, extract_skills_many
+from singleflight import SingleFlight
+from timing import span
+
+# Pages per category fetched by load_data() (bounded by the API's page_count)
+MUSE_PAGES = int(os.getenv('MUSE_PAGES', '3'))
+# Rows per chunk when streaming the local CSVs, and description characters kept per posting
+LOCAL_CSV_CHUNK_ROWS = int(os.getenv('LOCAL_CSV_CHUNK_ROWS', '50000'))
+LOCAL_DESCRIPTION_CHARS = 2000
+
+# Columns read from the local CSVs (everything else is skipped by the parser)
+POSTING_DTYPES = {
+    'job_id': 'str', 'title': 'str', 'company_name': 'str', 'location': 'str', 'description': 'str',
+    'formatted_experience_level': 'str', 'job_posting_url': 'str', 'pay_period': 'str',
+    'min_salary': 'float32', 'med_salary': 'float32', 'max_salary': 'float32'
+}
+JOB_SKILL_DTYPES = {'job_id': 'str', 'skill_abbr': 'str'}
+SKILL_MAPPING_DTYPES = {'skill_abbr': 'str', 'skill_name': 'str'}
+# The processed corpus includes live The Muse postings: reuse it for this long (shorter when
+# the live fetch came back empty, so an outage is not pinned for hours)
+CORPUS_MAX_AGE = 6 * 3600
+CORPUS_RETRY_AGE = 600
+CORPUS_VERSION = 1
+PAY_PERIODS = {'YEARLY': 'year', 'MONTHLY': 'month', 'BIWEEKLY': '2 weeks', 'WEEKLY': 'week', 'HOURLY': 'hour'}
 
 class DataEngine:
-    def __init__(self, data_path="data"):
+    MUSE_CATEGORIES = ["Software Engineering", "Design", "Data and Analytics", "Product Management"]
+    # Map user roles to Muse Categories
+    MUSE_CATEGORY_MAP = {
+        'data scientist': 'Data and Analytics',
+        'data analyst': 'Data and Analytics',
+        'software engineer': 'Software Engineering',
+        'software developer': 'Software Engineering',
+        'full stack developer': 'Software Engineering',
+        'product manager': 'Product Management',
+        'designer': 'Design',
+        'ux designer': 'Design',
+        'ui designer': 'Design'
+    }
+
+    def __init__(self, data_path="data", muse_client=None):
         self.data_path = data_path
+        self.muse = muse_client or MuseClient()
+        self._flight = SingleFlight()
         self.postings_path = os.path.join(data_path, "postings.csv")
         self.job_skills_path = os.path.join(data_path, "jobs", "job_skills.csv")
         self.skills_mapping_path = os.path.join(data_path, "mappings", "skills.csv")
-        self.processed_path = os.path.join(data_path, "processed_jobs.pkl")
+        self.processed_path = os.path.join(data_path, "processed_jobs")
+        self.corpus = CorpusStore(self.processed_path)
         
         # Common tech skills for extraction if doing real-time fetching
         self.common_skills = {
@@ -20,10 +65,63 @@ class DataEngine:
             'jira', 'figma', 'product management', 'marketing', 'seo', 'sales', 'excel'
         }
 
-    def load_data(self, samples=None):
+    def source_fingerprint(self):
+        """
+        Cheap fingerprint of the local data files (path, size, mtime).
+        Live API results are not covered; callers expire cached builds by age instead.
+        """
+        parts = []
+        for path in (self.postings_path, self.job_skills_path, self.skills_mapping_path):
+            try:
+                stat = os.stat(path)
+                parts.append(f"{path}:{stat.st_size}:{stat.st_mtime_ns}")
+            except OSError:
+                parts.append(f"{path}:missing")
+        return "|".join(parts)
+
+    def corpus_fingerprint(self, samples=None):
+        """Key of the processed corpus: local source files, live feed settings and samples."""
+        key = {
+            'version': CORPUS_VERSION,
+            'samples': samples,
+            'sources': self.source_fingerprint(),
+            'muse': [self.muse.base_url, self.MUSE_CATEGORIES, MUSE_PAGES]
+        }
+        return hashlib.sha256(json.dumps(key, sort_keys=True).encode()).hexdigest()[:32]
+
+    def load_data(self, samples=None, columns=None):
         """
         Loads data from API (Real) + Local CSVs (Legacy) + Mock (Fallback)
+        The processed result is kept as a columnar corpus (processed_path) and reused while
+        its fingerprint matches and the live fetch is recent. columns: optional projection.
         """
+        with span('load_data'):
+            fingerprint = self.corpus_fingerprint(samples)
+            with span('load_data.corpus'):
+                df = self._load_corpus(fingerprint, columns)
+            if df is not None:
+                print(f"Loaded processed corpus ({len(df)} jobs).")
+                return df
+
+            fetched_at = time.time()
+            df = self._load_data(samples)
+            live_jobs = int((df['source'] == 'The Muse').sum()) if 'source' in df else 0
+            with span('load_data.save_corpus'):
+                self.corpus.save(df, fingerprint, fetched_at=fetched_at, live_jobs=live_jobs)
+            if columns is not None:
+                df = df[[c for c in columns if c in df.columns]]
+            return df
+
+    def _load_corpus(self, fingerprint, columns):
+        manifest = self.corpus.manifest(fingerprint)
+        if manifest is None:
+            return None
+        max_age = CORPUS_MAX_AGE if manifest.get('live_jobs') else CORPUS_RETRY_AGE
+        if time.time() - manifest.get('fetched_at', 0) > max_age:
+            return None
+        return self.corpus.load(fingerprint, columns)
+
+    def _load_data(self, samples):
         print(f"Loading data...")
         
         real_df = pd.DataFrame()
@@ -32,7 +130,8 @@ class DataEngine:
         # No keys required for standard public access
         try:
             print("Trying The Muse API...")
-            real_jobs = self._fetch_themuse_jobs()
+            with span('load_data.muse'):
+                real_jobs = self._fetch_themuse_jobs()
             if real_jobs:
                 real_df = pd.DataFrame(real_jobs)
                 print(f"✅ Loaded {len(real_df)} real jobs from The Muse.")
@@ -42,7 +141,8 @@ class DataEngine:
         # 2. Load Local Legacy Data (if exists)
         legacy_df = pd.DataFrame()
         if os.path.exists(self.postings_path):
-            legacy_df = self._load_local_csv(samples)
+            with span('load_data.local_csv'):
+                legacy_df = self._load_local_csv(samples)
         
         # 3. Merge
         full_df = pd.concat([real_df, legacy_df], ignore_index=True)
@@ -55,19 +155,27 @@ class DataEngine:
             full_df = pd.concat([full_df, mock_df], ignore_index=True)
             
         # 5. Finalize Schema
-        full_df['mapped_skills'] = full_df['mapped_skills'].apply(lambda d: d if isinstance(d, list) else [])
-        full_df['formatted_experience_level'] = full_df['formatted_experience_level'].fillna('Not Specified')
-        
-        # Create Search Text
-        full_df['search_text'] = (
-            full_df['title'].fillna('') + " " + 
-            full_df['company_name'].fillna('') + " " + 
-            full_df['description'].fillna('')
-        ).str.lower()
+        with span('load_data.finalize'):
+            full_df['mapped_skills'] = full_df['mapped_skills'].apply(lambda d: d if isinstance(d, list) else [])
+            full_df['formatted_experience_level'] = full_df['formatted_experience_level'].fillna('Not Specified')
+            
+            # Create Search Text
+            full_df['search_text'] = (
+                full_df['title'].fillna('') + " " + 
+                full_df['company_name'].fillna('') + " " + 
+                full_df['description'].fillna('')
+            ).str.lower()
         
         print(f"Total Jobs Available: {len(full_df)}")
         return full_df
 
+    def muse_category(self, query):
+        """Maps a user role to a Muse category"""
+        # If query is not in map, maybe try using it as a keyword search instead of category?
+        # But search_jobs logic assumes category currently. 
+        # Let's stick to mapped category + strict default for now to ensure results.
+        return self.MUSE_CATEGORY_MAP.get((query or '').lower(), "Software Engineering") # Default
+
     def search_jobs(self, query, location=None, page=1):
         """
         Real-time job search using The Muse API.
@@ -76,136 +184,160 @@ class DataEngine:
         print(f"🎵 Searching The Muse: Query='{query}', Location='{location}'")
         
         try:
-            # The Muse API params
-            # Map user roles to Muse Categories
-            category_map = {
-                'data scientist': 'Data and Analytics',
-                'data analyst': 'Data and Analytics',
-                'software engineer': 'Software Engineering',
-                'software developer': 'Software Engineering',
-                'full stack developer': 'Software Engineering',
-                'product manager': 'Product Management',
-                'designer': 'Design',
-                'ux designer': 'Design',
-                'ui designer': 'Design'
-            }
-            
-            muse_category = category_map.get(query.lower(), "Software Engineering") # Default
-            
-            # If query is not in map, maybe try using it as a keyword search instead of category?
-            # But search_jobs logic assumes category currently. 
-            # Let's stick to mapped category + strict default for now to ensure results.
-
-            params = {
-                'category': muse_category,
-                'page': page
-            }
-            if location:
-                params['location'] = location
-
-            response = requests.get("https://www.themuse.com/api/public/jobs", params=params, timeout=5)
-            
-            if response.status_code == 200:
-                data = response.json()
-                for item in data.get('results', []):
-                    # Extract description content (Muse returns HTML)
-                    desc_html = item.get('contents', '')
-                    # Simple cleanup of HTML tags for text search
-                    desc_text = re.sub('<[^<]+?>', ' ', desc_html)
-                    
-                    # Extract skills
-                    skills = self._extract_skills_from_text(desc_text)
-                    
-                    # Locations
-                    loc = "Remote"
-                    if item.get('locations'):
-                        loc = item.get('locations')[0].get('name')
-
-                    results.append({
-                        'job_id': str(item.get('id')),
-                        'title': item.get('name'),
-                        'company_name': item.get('company', {}).get('name', 'Confidential Company'),
-                        'location': loc,
-                        'description': desc_text[:1000] + "...", 
-                        'full_description': desc_text, # Keep full for deep analysis
-                        'formatted_experience_level': item.get('levels', [{'name': 'Entry'}])[0].get('name'),
-                        'salary_disp': "Competitive", 
-                        'mapped_skills': skills,
-                        'is_active': True,
-                        'job_url': item.get('refs', {}).get('landing_page'),
-                        'source': 'The Muse'
-                    })
-            else:
-                print(f"The Muse API returned {response.status_code}")
-                
+            results = self.fetch_jobs(self.muse_category(query), location, page)
         except Exception as e:
             print(f"The Muse Search Error: {e}")
             
         return results
 
-    def _fetch_themuse_jobs(self):
-        """Legacy batch fetcher - delegates to search_jobs now to reuse logic"""
-        all_results = []
-        categories = ["Software Engineering", "Design", "Data and Analytics", "Product Management"]
-        for cat in categories:
-            results = self.search_jobs(query=cat)
-            all_results.extend(results)
-        return all_results
+    def fetch_jobs(self, category, location=None, page=1):
+        """
+        One page of a Muse category as job records. Raises on API errors.
+        Concurrent identical fetches share one request (and the same result list).
+        """
+        key = (category, (location or '').strip().lower(), page)
+        return self._flight.do(key, self._fetch_jobs, category, location, page)
+
+    def _fetch_jobs(self, category, location, page):
+        items, _ = self.muse.fetch_page(category, page, location)
+        return self._parse_muse_items(items)
+
+    def _parse_muse_items(self, items):
+        """Raw Muse jobs -> job records"""
+        # Extract description content (Muse returns HTML)
+        # Simple cleanup of HTML tags for text search
+        texts = [re.sub('<[^<]+?>', ' ', item.get('contents', '')) for item in items]
+        # Extract skills
+        skills = extract_skills_many(texts)
+        return [self._parse_muse_item(item, text, found) for item, text, found in zip(items, texts, skills)]
+
+    def _parse_muse_item(self, item, desc_text, skills):
+        """Raw Muse job -> job record"""
+        # Locations
+        loc = "Remote"
+        if item.get('locations'):
+            loc = item.get('locations')[0].get('name')
+
+        return {
+            'job_id': str(item.get('id')),
+            'title': item.get('name'),
+            'company_name': item.get('company', {}).get('name', 'Confidential Company'),
+            'location': loc,
+            'description': desc_text[:1000] + "...", 
+            'full_description': desc_text, # Keep full for deep analysis
+            'formatted_experience_level': item.get('levels', [{'name': 'Entry'}])[0].get('name'),
+            'salary_disp': "Competitive", 
+            'mapped_skills': skills,
+            'is_active': True,
+            'job_url': item.get('refs', {}).get('landing_page'),
+            'source': 'The Muse'
+        }
+
+    def _fetch_themuse_jobs(self, pages=None):
+        """Batch fetcher: every category and up to MUSE_PAGES pages each, fetched concurrently"""
+        items = self.muse.fetch_many(self.MUSE_CATEGORIES, pages=pages or MUSE_PAGES)
+        return self._parse_muse_items(items)
 
     def _extract_skills_from_text(self, text):
         """
-        Robust skill extraction using keyword matching.
+        Robust skill extraction using keyword matching (shared compiled extractor).
         """
-        found = set()
-        text_lower = text.lower()
+        return extract_skills(text)
         
-        # Extended dictionary for better matching
-        keywords = {
-            'Python': ['python'],
-            'Java': ['java', 'jvm'],
-            'JavaScript': ['javascript', 'js', 'es6'],
-            'React': ['react', 'reactjs'],
-            'Node.js': ['node.js', 'nodejs', 'node'],
-            'SQL': ['sql', 'mysql', 'postgresql', 'postgres'],
-            'AWS': ['aws', 'amazon web services'],
-            'Docker': ['docker', 'container'],
-            'Kubernetes': ['kubernetes', 'k8s'],
-            'Machine Learning': ['machine learning', 'ml', 'ai'],
-            'Data Analysis': ['data analysis', 'analytics'],
-            'Go': ['golang', 'go lang'],
-            'Rust': ['rust'],
-            'C++': ['c++'],
-            'Git': ['git', 'github'],
-            'Agile': ['agile', 'scrum'],
-            'Communication': ['communication', 'verbal', 'written'],
-            'Teamwork': ['teamwork', 'collaboration'],
-            'Figma': ['figma', 'sketch'],
-            'Marketing': ['marketing', 'seo', 'sem'],
-            'Sales': ['sales', 'selling']
-        }
+    def _load_local_csv(self, samples):
+        """
+        Local postings with skills from job_skills.csv (through the skills.csv mapping)
+        plus keyword skills from the description. See _iter_postings for the chunking.
+        """
+        # 1. Postings (first `samples` rows), only the needed columns
+        chunks = list(self._iter_postings(samples))
+        if not chunks:
+            return pd.DataFrame()
+        df = pd.concat(chunks, ignore_index=True)
 
-        for skill, patterns in keywords.items():
-            for pattern in patterns:
-                # Use word boundary to avoid partial matches (e.g. 'go' in 'good')
-                if re.search(r'\b' + re.escape(pattern) + r'\b', text_lower):
-                    found.add(skill)
-                    break # Found this skill, move to next
-
-        # Fallbacks based on context if strictly nothing found
-        if not found:
-            if 'software' in text_lower or 'developer' in text_lower:
-                found.update(['Software Engineering', 'Git'])
-            elif 'design' in text_lower:
-                found.update(['Design', 'Figma'])
-            elif 'data' in text_lower:
-                found.update(['Data Analysis', 'SQL'])
+        # 2. Hash join job_id -> skill names, restricted to the loaded postings
+        joined = self._load_job_skills(set(df['job_id']))
+        df['mapped_skills'] = [
+            list(dict.fromkeys(joined.get(job_id, []) + extracted)) or context_fallback(description.lower())
+            for job_id, extracted, description in zip(df['job_id'], df['mapped_skills'], df['description'])
+        ]
+        print(f"Loaded {len(df)} local postings ({sum(1 for j in df['job_id'] if j in joined)} with mapped skills).")
+        return df
+
+    def _iter_postings(self, samples=None):
+        """
+        Streams postings.csv in LOCAL_CSV_CHUNK_ROWS chunks (explicit dtypes, needed columns
+        only) and yields each chunk in the loaded schema. Keyword skills are extracted from
+        the full description before it is cut to LOCAL_DESCRIPTION_CHARS, so memory is
+        bounded by one raw chunk plus the compact rows kept. Reading stops after `samples` rows.
+        """
+        remaining = samples
+        with pd.read_csv(self.postings_path, usecols=lambda c: c in POSTING_DTYPES, dtype=POSTING_DTYPES,
+                         chunksize=LOCAL_CSV_CHUNK_ROWS) as reader:
+            for chunk in reader:
+                if remaining is not None:
+                    chunk = chunk.iloc[:remaining]
+                    remaining -= len(chunk)
+                chunk = chunk.dropna(subset=['job_id'])
+                yield self._posting_chunk(chunk)
+                if remaining is not None and remaining <= 0:
+                    break
+
+    def _posting_chunk(self, chunk):
+        descriptions = chunk['description'].fillna('') if 'description' in chunk else pd.Series('', index=chunk.index)
+        # Keyword skills without the generic fallback; rows with no skills at all get it after the join
+        extracted = extract_skills_many(descriptions.tolist(), fallback=False)
+        return pd.DataFrame({
+            'job_id': chunk['job_id'].str.strip(),
+            'title': chunk.get('title'),
+            'company_name': chunk['company_name'].fillna('Confidential Company') if 'company_name' in chunk else 'Confidential Company',
+            'location': chunk.get('location'),
+            'description': descriptions.str.slice(0, LOCAL_DESCRIPTION_CHARS),
+            'formatted_experience_level': chunk.get('formatted_experience_level'),
+            'salary_disp': self._salary_display(chunk),
+            'mapped_skills': extracted,
+            'is_active': True,
+            'job_url': chunk.get('job_posting_url'),
+            'source': 'local_csv'
+        }, index=chunk.index)
+
+    def _salary_display(self, chunk):
+        """'$85,000/year' (median) or '$70,000 - $100,000/year' (range), else 'Competitive'"""
+        def column(name):
+            return chunk[name].tolist() if name in chunk else [None] * len(chunk)
+        labels = []
+        for low, mid, high, period in zip(column('min_salary'), column('med_salary'), column('max_salary'), column('pay_period')):
+            suffix = '/' + PAY_PERIODS[period] if period in PAY_PERIODS else ''
+            if pd.notna(mid):
+                labels.append(f"${mid:,.0f}{suffix}")
+            elif pd.notna(low) and pd.notna(high):
+                labels.append(f"${low:,.0f} - ${high:,.0f}{suffix}")
             else:
-                found.update(['Communication', 'Teamwork'])
-        
-        return list(found)
-        
-    def _load_local_csv(self, samples):
-        return pd.DataFrame()
+                labels.append("Competitive")
+        return labels
+
+    def _load_job_skills(self, job_ids):
+        """
+        job_id -> [skill name] for the given jobs: skills.csv (small) is loaded into a dict
+        and job_skills.csv is streamed in chunks, keeping only rows of wanted jobs.
+        """
+        if not os.path.exists(self.job_skills_path):
+            return {}
+        names = {}
+        if os.path.exists(self.skills_mapping_path):
+            mapping = pd.read_csv(self.skills_mapping_path, usecols=list(SKILL_MAPPING_DTYPES), dtype=SKILL_MAPPING_DTYPES)
+            names = dict(zip(mapping['skill_abbr'].str.strip(), mapping['skill_name'].str.strip()))
+
+        joined = {}
+        with pd.read_csv(self.job_skills_path, usecols=list(JOB_SKILL_DTYPES), dtype=JOB_SKILL_DTYPES,
+                         chunksize=LOCAL_CSV_CHUNK_ROWS) as reader:
+            for chunk in reader:
+                chunk = chunk.dropna()
+                chunk = chunk[chunk['job_id'].str.strip().isin(job_ids)]
+                for job_id, abbr in zip(chunk['job_id'].str.strip(), chunk['skill_abbr'].str.strip()):
+                    # Unmapped abbreviations are kept as is
+                    joined.setdefault(job_id, []).append(names.get(abbr, abbr))
+        return joined
 
     def _generate_mock_jobs(self):
         """Generates diverse jobs to ensure the app works for non-DS roles."""
@@ -179,6 +179,22 @@ class UserModel:
 
 # Candidate profile helpers
 class CandidateProfileModel:
+    # Callbacks run with the stored profile document after every profile write
+    # (e.g. the candidate skill index used for reverse matching)
+    listeners = []
+
+    @staticmethod
+    def add_listener(callback):
+        CandidateProfileModel.listeners.append(callback)
+
+    @staticmethod
+    def _notify(profile):
+        for callback in CandidateProfileModel.listeners:
+            try:
+                callback(profile)
+            except Exception as e:
+                print(f"Profile listener error: {e}")
+
     @staticmethod
     def create(user_id, full_name, experience_level, target_role, location):
         """Create candidate profile"""
@@ -194,6 +210,7 @@ class CandidateProfileModel:
         }
         result = candidate_profiles_collection.insert_one(profile)
         profile['_id'] = result.inserted_id
+        CandidateProfileModel._notify(profile)
         return profile
     
     @staticmethod
@@ -208,6 +225,13 @@ class CandidateProfileModel:
             {'user_id': str(user_id)},
             {'$set': update_data}
         )
+        if CandidateProfileModel.listeners:
+            CandidateProfileModel._notify(CandidateProfileModel.find_by_user_id(user_id))
+
+    @staticmethod
+    def update_skills(user_id, skills):
+        """Replace the skill list of a profile"""
+        CandidateProfileModel.update(user_id, {'skills': skills, 'updated_at': datetime.utcnow()})
 
 # Company profile helpers
 class CompanyProfileModel:
@@ -232,7 +256,7 @@ class CompanyProfileModel:
 # Job model helpers
 class JobModel:
     @staticmethod
-    def create(company_id, title, description, requirements, salary_range, location, job_type):
+    def create(company_id, title, description, requirements, salary_range, location, job_type, experience_level='entry'):
         """Create job posting"""
         job = {
             'company_id': str(company_id),
@@ -242,6 +266,7 @@ class JobModel:
             'salary_range': salary_range,
             'location': location,
             'job_type': job_type,
+            'experience_level': experience_level,
             'is_active': True,
             'skills': requirements, # Duplicate for matcher compatibility
             'created_at': datetime.utcnow()
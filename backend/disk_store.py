@@ -0,0 +1,44 @@
+import os
+import shutil
+import tempfile
+import numpy as np
+
+
+def load_array(path, mmap_mode='r'):
+    """
+    Memory-maps a .npy file ('r' read-only, 'c' copy-on-write); empty arrays cannot be
+    mapped and are read normally.
+    """
+    try:
+        return np.load(path, mmap_mode=mmap_mode)
+    except ValueError:
+        return np.load(path)
+
+
+def save_directory(root, name, write, what):
+    """
+    Replaces root/name with a directory filled by write(path): written under a temporary
+    name, renamed into place, then every other entry of root is removed (older
+    fingerprints). write may return False to abort. Failures are logged as
+    "Could not save <what>". Returns True once the directory is in place.
+    """
+    tmp_path = None
+    try:
+        os.makedirs(root, exist_ok=True)
+        tmp_path = tempfile.mkdtemp(prefix='.tmp-', dir=root)
+        if write(tmp_path) is False:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            return False
+        target = os.path.join(root, name)
+        shutil.rmtree(target, ignore_errors=True)
+        os.rename(tmp_path, target)
+    except Exception as e:
+        print(f"Could not save {what}: {e}")
+        if tmp_path:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+        return False
+
+    for entry in os.listdir(root):
+        if entry != name:
+            shutil.rmtree(os.path.join(root, entry), ignore_errors=True)
+    return True
@@ -0,0 +1,396 @@
+import json
+import math
+import os
+import pickle
+import numpy as np
+from scipy import sparse
+from disk_store import load_array
+from skill_demand import SkillDemand, role_cluster
+
+
+class GrowableArray:
+    """
+    Append-only NumPy buffer with amortized O(1) appends (capacity doubling).
+    view() returns the filled prefix without copying.
+    """
+    def __init__(self, dtype, capacity=1024):
+        self._data = np.empty(max(1, capacity), dtype=dtype)
+        self._size = 0
+
+    def _reserve(self, size):
+        if size > len(self._data):
+            grown = np.empty(max(size, 2 * len(self._data)), dtype=self._data.dtype)
+            grown[:self._size] = self._data[:self._size]
+            self._data = grown
+
+    def append(self, value):
+        self._reserve(self._size + 1)
+        self._data[self._size] = value
+        self._size += 1
+
+    def extend(self, values):
+        values = np.asarray(values, dtype=self._data.dtype)
+        self._reserve(self._size + len(values))
+        self._data[self._size:self._size + len(values)] = values
+        self._size += len(values)
+
+    @classmethod
+    def wrap(cls, array):
+        """
+        Uses an existing array (e.g. a copy-on-write memory map) as the filled buffer.
+        The first append copies it into a private, growable buffer.
+        """
+        buffer = cls.__new__(cls)
+        buffer._data = array
+        buffer._size = len(array)
+        return buffer
+
+    def __setitem__(self, index, value):
+        self.view()[index] = value
+
+    def view(self):
+        return self._data[:self._size]
+
+    def __len__(self):
+        return self._size
+
+
+class JobIndex:
+    """
+    Compact, array-backed store of the job corpus used for scoring.
+    Every job is a row holding its display columns, its interned skill-ID array
+    (CSR layout over the skill vocabulary) and the total importance weight of those skills.
+    Inverted posting lists (skill -> rows, experience level -> rows) are kept in sync on
+    every add so matching can skip jobs that share nothing with a user. When a fitted
+    TF-IDF vectorizer is supplied, each row also carries its search-text vector.
+
+    Rows are append-only: deactivating a job leaves a tombstone (active=False) that
+    scoring skips, and compacted() rebuilds the index without them.
+    """
+    # Columns kept for building match payloads (see CareerMatcher._build_result)
+    COLUMNS = ['job_id', 'title', 'company_name', 'company', 'location',
+               'formatted_experience_level', 'salary_disp', 'mapped_skills', 'source']
+
+    # Array files of a saved index (name -> attribute holding the GrowableArray)
+    ARRAY_FILES = {
+        'vocab_weights': '_vocab_weights',
+        'skill_indptr': '_indptr',
+        'skill_indices': '_indices',
+        'total_weight': '_total_weight',
+        'experience_codes': '_experience_codes',
+        'active': '_active',
+        'text_indptr': '_text_indptr',
+        'text_indices': '_text_indices',
+        'text_data': '_text_data',
+    }
+
+    def __init__(self, normalize_skills, skill_weight, experience_levels, vectorizer=None):
+        self.normalize_skills = normalize_skills
+        self.skill_weight = skill_weight
+        self.experience_levels = experience_levels
+        self.vectorizer = vectorizer
+
+        # Skill vocabulary (interned skill names)
+        self.skill_vocab = {}
+        self.skill_names = []
+        self._vocab_weights = GrowableArray(np.float64, 256)
+
+        # Per-job columns
+        self.columns = {c: [] for c in self.COLUMNS}
+        self._indptr = GrowableArray(np.int64)
+        self._indptr.append(0)
+        self._indices = GrowableArray(np.int32)
+        self._total_weight = GrowableArray(np.float64)
+        self._experience_codes = GrowableArray(np.int8)
+        self._active = GrowableArray(np.bool_)
+        self.row_of = {}
+        self.tombstones = 0
+
+        # Inverted indexes (key -> GrowableArray of row numbers, ascending)
+        self.skill_postings = {}
+        self.level_rows = {}
+
+        # TF-IDF rows of each job's search text (CSR layout, same row order)
+        self._text_indptr = GrowableArray(np.int64)
+        self._text_indptr.append(0)
+        self._text_indices = GrowableArray(np.int32)
+        self._text_data = GrowableArray(np.float64)
+
+        self._matrix = None
+        self._text_matrix = None
+        # Skill demand table, built on first use and then updated incrementally
+        self._demand = None
+
+    def __len__(self):
+        return len(self._total_weight)
+
+    def intern(self, skill):
+        """Returns the integer ID of a normalized skill, adding it to the vocabulary if new."""
+        idx = self.skill_vocab.get(skill)
+        if idx is None:
+            idx = len(self.skill_names)
+            self.skill_vocab[skill] = idx
+            self.skill_names.append(skill)
+            self._vocab_weights.append(self.skill_weight(skill))
+        return idx
+
+    def _add(self, job):
+        """Appends the skill/column data of one job (dict-like) and returns its row number."""
+        job_skills = job.get('mapped_skills') or job.get('skills') or []
+        job_set = self.normalize_skills(job_skills if isinstance(job_skills, list) else [])
+        skill_ids = sorted(self.intern(s) for s in job_set)
+
+        record = {col: _clean(job.get(col)) for col in self.COLUMNS}
+        record['job_id'] = str(job.get('job_id') or job.get('_id') or 'unknown')
+        experience_code = self.experience_levels.get(job.get('formatted_experience_level'), 1)
+        return self._add_compiled(record, skill_ids, experience_code)
+
+    def extend_records(self, jobs):
+        """Appends a list of job dicts, skipping (and reporting) malformed ones."""
+        texts = []
+        for job in jobs:
+            try:
+                self._add(job)
+                texts.append(search_text(job))
+            except Exception as e:
+                print(f"Skipping job {job.get('title', 'unknown')} due to scoring error: {e}")
+        self._append_text_rows(texts)
+        return self
+
+    def extend_dataframe(self, df, text_matrix=None):
+        """
+        Appends every row of a processed jobs DataFrame without a records round-trip.
+        text_matrix: TF-IDF rows already computed for df (e.g. by fit_transform).
+        """
+        present = [c for c in self.COLUMNS + ['skills', '_id'] if c in df.columns]
+        column_values = [df[c].tolist() for c in present]
+        for values in zip(*column_values):
+            self._add(dict(zip(present, values)))
+        if text_matrix is None:
+            self._append_text_rows(df['search_text'].fillna('').tolist())
+        else:
+            self._append_text_matrix(text_matrix)
+        return self
+
+    def deactivate(self, job_id):
+        """Tombstones the row of a job. Returns False if the job is not (or no longer) indexed."""
+        row = self.row_of.pop(str(job_id), None)
+        if row is None or not self._active.view()[row]:
+            return False
+        self._active[row] = False
+        self.tombstones += 1
+        if self._demand is not None:
+            self._demand.remove([self.skill_names[k] for k in self.skill_ids(row)],
+                                role_cluster(self.columns['title'][row]), int(self.experience_codes[row]))
+        return True
+
+    def compacted(self, rows=None, text_matrix=None):
+        """
+        Returns a new index holding only the given rows (default: active rows), in order.
+        The skill vocabulary is rebuilt from the surviving jobs.
+        """
+        if rows is None:
+            rows = self.active_rows()
+        index = JobIndex(self.normalize_skills, self.skill_weight, self.experience_levels, self.vectorizer)
+        return index.copy_rows(self, rows, text_matrix)
+
+    def copy_rows(self, source, rows, text_matrix=None):
+        """
+        Appends rows of another index (columns, skills and text vectors) to this one.
+        text_matrix: source text matrix captured by the caller (defaults to source.text_matrix).
+        """
+        for row in rows:
+            skill_ids = sorted(self.intern(source.skill_names[k]) for k in source.skill_ids(row))
+            self._add_compiled(source.record(row), skill_ids, source.experience_codes[row])
+        if text_matrix is None:
+            text_matrix = source.text_matrix
+        self._append_text_matrix(text_matrix[rows])
+        return self
+
+    def save(self, path):
+        """
+        Writes the index to a directory: one .npy file per array (CSR parts of the skill
+        and TF-IDF matrices, per-job columns, skill posting lists), the skill vocabulary
+        as JSON and the payload columns as a pickle. The vectorizer is not included.
+        """
+        os.makedirs(path, exist_ok=True)
+        for name, attr in self.ARRAY_FILES.items():
+            np.save(os.path.join(path, f"{name}.npy"), getattr(self, attr).view())
+
+        # Skill posting lists stored as one CSR-style (skill -> rows) pair of arrays
+        postings = [self.skill_postings[k].view() if k in self.skill_postings else np.empty(0, dtype=np.int32)
+                    for k in range(len(self.skill_names))]
+        posting_indptr = np.zeros(len(postings) + 1, dtype=np.int64)
+        posting_indptr[1:] = np.cumsum([len(p) for p in postings])
+        np.save(os.path.join(path, "posting_indptr.npy"), posting_indptr)
+        np.save(os.path.join(path, "posting_rows.npy"),
+                np.concatenate(postings) if postings else np.empty(0, dtype=np.int32))
+
+        with open(os.path.join(path, "skill_vocab.json"), "w") as f:
+            json.dump(self.skill_names, f)
+        with open(os.path.join(path, "columns.pkl"), "wb") as f:
+            pickle.dump({'columns': self.columns, 'row_of': self.row_of, 'tombstones': self.tombstones}, f,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, path, normalize_skills, skill_weight, experience_levels, vectorizer=None):
+        """
+        Opens an index written by save(). Arrays are memory-mapped copy-on-write, so loading
+        costs no parsing and later adds/deactivations never touch the files.
+        """
+        index = cls(normalize_skills, skill_weight, experience_levels, vectorizer)
+        for name, attr in cls.ARRAY_FILES.items():
+            setattr(index, attr, GrowableArray.wrap(load_array(os.path.join(path, f"{name}.npy"), 'c')))
+
+        with open(os.path.join(path, "skill_vocab.json")) as f:
+            index.skill_names = json.load(f)
+        index.skill_vocab = {skill: k for k, skill in enumerate(index.skill_names)}
+
+        posting_indptr = np.load(os.path.join(path, "posting_indptr.npy"))
+        posting_rows = load_array(os.path.join(path, "posting_rows.npy"), 'c')
+        for k in range(len(index.skill_names)):
+            if posting_indptr[k + 1] > posting_indptr[k]:
+                index.skill_postings[k] = GrowableArray.wrap(posting_rows[posting_indptr[k]:posting_indptr[k + 1]])
+
+        codes = index.experience_codes
+        for code in np.unique(codes):
+            index.level_rows[int(code)] = GrowableArray.wrap(np.flatnonzero(codes == code).astype(np.int32))
+
+        with open(os.path.join(path, "columns.pkl"), "rb") as f:
+            stored = pickle.load(f)
+        index.columns = stored['columns']
+        index.row_of = stored['row_of']
+        index.tombstones = stored['tombstones']
+        return index
+
+    def _add_compiled(self, job, skill_ids, experience_code):
+        """
+        Appends a job (payload columns) whose skills are already interned in this index.
+        skill_ids are kept ascending so weight sums add up in the same order in every scoring path.
+        """
+        row = len(self)
+        for col in self.COLUMNS:
+            self.columns[col].append(job.get(col))
+        self._indices.extend(skill_ids)
+        self._indptr.append(len(self._indices))
+        weights = self._vocab_weights.view()
+        # Sequential sum (same order as reweight's bincount)
+        self._total_weight.append(float(sum(weights[skill_ids].tolist())))
+        self._experience_codes.append(experience_code)
+        self._active.append(True)
+        self.row_of[job['job_id']] = row
+        for skill_id in skill_ids:
+            _append_posting(self.skill_postings, skill_id, row)
+        _append_posting(self.level_rows, experience_code, row)
+        if self._demand is not None:
+            self._demand.add([self.skill_names[k] for k in skill_ids], role_cluster(job.get('title')), int(experience_code))
+        self._matrix = None
+        return row
+
+    def reweight(self):
+        """Recomputes every skill weight (and job total) from skill_weight, e.g. after its inputs changed."""
+        weights = np.array([self.skill_weight(skill) for skill in self.skill_names], dtype=np.float64)
+        indptr, indices = self._indptr.view(), self._indices.view()
+        entry_rows = np.repeat(np.arange(len(self)), np.diff(indptr))
+        self._vocab_weights = GrowableArray.wrap(weights)
+        self._total_weight = GrowableArray.wrap(np.bincount(entry_rows, weights=weights[indices], minlength=len(self)))
+        self._matrix = None
+
+    def _append_text_rows(self, texts):
+        if self.vectorizer is not None and texts:
+            self._append_text_matrix(self.vectorizer.transform(texts))
+        else:
+            self._text_indptr.extend(np.full(len(texts), len(self._text_indices)))
+            self._text_matrix = None
+
+    def _append_text_matrix(self, matrix):
+        matrix = matrix.tocsr()
+        self._text_indptr.extend(matrix.indptr[1:] + len(self._text_indices))
+        self._text_indices.extend(matrix.indices)
+        self._text_data.extend(matrix.data)
+        self._text_matrix = None
+
+    def record(self, row):
+        """Returns the stored columns of one job as a dict (missing columns omitted)."""
+        return {c: self.columns[c][row] for c in self.COLUMNS if self.columns[c][row] is not None}
+
+    def skill_rows(self, skill):
+        """Rows of the jobs requiring a normalized skill (empty if unknown)."""
+        postings = self.skill_postings.get(self.skill_vocab.get(skill))
+        return postings.view() if postings is not None else np.empty(0, dtype=np.int32)
+
+    def skill_ids(self, row):
+        indptr = self._indptr.view()
+        return self._indices.view()[indptr[row]:indptr[row + 1]]
+
+    def active_rows(self):
+        return np.flatnonzero(self._active.view())
+
+    @property
+    def active(self):
+        """Boolean mask, False for tombstoned rows."""
+        return self._active.view()
+
+    @property
+    def demand(self):
+        """SkillDemand table over the active jobs."""
+        if self._demand is None:
+            self._demand = SkillDemand.from_index(self)
+        return self._demand
+
+    @property
+    def vocab_weights(self):
+        """Importance weight of every skill in the vocabulary."""
+        return self._vocab_weights.view()
+
+    @property
+    def total_weight(self):
+        return self._total_weight.view()
+
+    @property
+    def experience_codes(self):
+        return self._experience_codes.view()
+
+    @property
+    def skill_matrix(self):
+        """jobs x skills CSR matrix of skill importance weights."""
+        if self._matrix is None:
+            indices = self._indices.view()
+            self._matrix = sparse.csr_matrix(
+                (self._vocab_weights.view()[indices], indices, self._indptr.view()),
+                shape=(len(self), len(self.skill_names))
+            )
+        return self._matrix
+
+    @property
+    def text_matrix(self):
+        """jobs x terms CSR matrix of TF-IDF search-text vectors (zero columns without a vectorizer)."""
+        if self._text_matrix is None:
+            n_terms = len(self.vectorizer.vocabulary_) if self.vectorizer is not None else 0
+            self._text_matrix = sparse.csr_matrix(
+                (self._text_data.view(), self._text_indices.view(), self._text_indptr.view()),
+                shape=(len(self), n_terms)
+            )
+        return self._text_matrix
+
+
+def _append_posting(postings, key, row):
+    rows = postings.get(key)
+    if rows is None:
+        rows = postings[key] = GrowableArray(np.int32, 8)
+    rows.append(row)
+
+
+def search_text(job):
+    """Text used for TF-IDF role alignment (same recipe as DataEngine.load_data)."""
+    text = job.get('search_text')
+    if isinstance(text, str):
+        return text
+    return f"{job.get('title') or ''} {job.get('company_name') or job.get('company') or ''} {job.get('description') or ''}".lower()
+
+
+def _clean(value):
+    """NaN -> '' (mirrors DataFrame.fillna('') on the old records path)."""
+    if isinstance(value, float) and math.isnan(value):
+        return ''
+    return value
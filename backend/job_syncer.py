@@ -30,9 +30,8 @@ class JobSyncer:
             new_job['job_id'] = new_job_id
             
             # 2. Add to Matcher Engine (Memory)
-            # In a real system, we'd update the DataFrame incrementally.
-            # Here we might need to reload or append.
-            # self.matcher.add_job(new_job) # Hypothetical method
+            # Appended to the live index incrementally, no retraining needed
+            self.matcher.add_job(new_job)
             
             # 3. Broadcast Event
             # "Someone just posted a job!"
@@ -0,0 +1,129 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class MatchCache:
+    """
+    LRU cache of match results per (profile fingerprint, job index version).
+    An entry holds the ranked result prefix computed so far (or the full ranking) and the
+    average readiness. Bounded by entry count and by the total number of cached result
+    payloads; a ranking larger than the payload budget is not cached.
+
+    Entries of older index versions are dropped as soon as a newer version is seen, and
+    invalidate_owner() drops everything cached for a user's profile.
+    Cached results are shared: callers must treat them as read-only.
+    """
+    def __init__(self, max_entries=512, max_results=50000):
+        self.max_entries = max_entries
+        self.max_results = max_results
+        self._entries = OrderedDict()   # (fingerprint, version) -> entry dict
+        self._owners = {}               # user_id -> set of fingerprints
+        self._version = None
+        self._results = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, fingerprint, version):
+        """Returns the entry dict (results, complete, average) or None."""
+        with self._lock:
+            entry = self._entries.get((fingerprint, version))
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end((fingerprint, version))
+            self.hits += 1
+            return entry
+
+    def put(self, fingerprint, version, results=None, complete=False, average=None, owner=None):
+        """
+        Stores ranked results (a prefix of the ranking unless complete) and/or the average
+        readiness for a profile. Existing fields of the entry are kept unless replaced.
+        """
+        with self._lock:
+            if self._version is not None and version < self._version:
+                return
+            if version != self._version:
+                self._clear()
+                self._version = version
+
+            key = (fingerprint, version)
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = {'results': None, 'complete': False, 'average': None}
+            self._entries.move_to_end(key)
+
+            if results is not None and len(results) <= self.max_results:
+                self._results += len(results) - len(entry['results'] or ())
+                entry['results'] = results
+                entry['complete'] = complete
+            if average is not None:
+                entry['average'] = average
+            if owner is not None:
+                self._owners.setdefault(str(owner), set()).add(fingerprint)
+
+            while len(self._entries) > self.max_entries or self._results > self.max_results:
+                _, evicted = self._entries.popitem(last=False)
+                self._results -= len(evicted['results'] or ())
+
+    def invalidate_owner(self, user_id):
+        """Drops every entry cached for a user's profile (call on profile updates)."""
+        with self._lock:
+            fingerprints = self._owners.pop(str(user_id), set())
+            for key in [k for k in self._entries if k[0] in fingerprints]:
+                self._results -= len(self._entries.pop(key)['results'] or ())
+
+    def clear(self):
+        with self._lock:
+            self._clear()
+
+    def _clear(self):
+        self._entries.clear()
+        self._owners.clear()
+        self._results = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class CursorError(LookupError):
+    """A pagination cursor that is malformed, expired or belongs to another profile."""
+
+
+class RankedSnapshots:
+    """
+    Short-lived ranked snapshots for cursor pagination: key -> the job index ranked on and
+    its rows in rank order (no payloads). Pages of a snapshot stay stable while it lives,
+    even if the live index changes meanwhile. Entries expire after ttl seconds; at most
+    max_entries are kept (least recently used dropped first).
+    """
+    def __init__(self, max_entries=64, ttl=300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()   # key -> (expires at, snapshot dict)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            if item[0] < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return item[1]
+
+    def put(self, key, snapshot):
+        with self._lock:
+            now = time.monotonic()
+            self._entries[key] = (now + self.ttl, snapshot)
+            self._entries.move_to_end(key)
+            for stale in [k for k, (expires, _) in self._entries.items() if expires < now]:
+                del self._entries[stale]
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
@@ -1,16 +1,119 @@
+import base64
+import hashlib
+import json
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import BrokenExecutor
+from functools import lru_cache
 import pandas as pd
 import numpy as np
+from scipy import sparse
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import linear_kernel
+from disk_store import save_directory
 from ml_engine import MLMatcher
+from job_index import JobIndex
+from skill_demand import CLUSTER_NAMES
+from match_cache import MatchCache, RankedSnapshots, CursorError
+from sharded_matcher import ShardedScorer
+from timing import span
+
+SKILL_SYNONYMS = {
+    'js': 'javascript',
+    'reactjs': 'react',
+    'react.js': 'react',
+    'node.js': 'node',
+    'nodejs': 'node',
+    'py': 'python',
+    'ml': 'machine learning',
+    'ai': 'artificial intelligence',
+    'aws': 'amazon web services',
+    'excel': 'microsoft excel'
+}
+
+@lru_cache(maxsize=8192)
+def normalize_skill(skill_name):
+    """Lowercase one skill name and map synonyms (cached, skill vocabularies are small)."""
+    clean = skill_name.lower().strip()
+    return SKILL_SYNONYMS.get(clean, clean)
 
 class CareerMatcher:
-    def __init__(self, data_engine):
+    # Map levels to numeric for distance calculation
+    EXPERIENCE_LEVELS = {
+        'Internship': 0,
+        'Entry level': 1,
+        'Associate': 2,
+        'Mid-Senior level': 3,
+        'Director': 4,
+        'Executive': 5,
+        'Not Specified': 1 # Assume entry level if unknown
+    }
+    # Experience score indexed by level distance (see calculate_experience_score)
+    EXPERIENCE_DISTANCE_SCORES = np.array([1.0, 0.8, 0.5, 0.2, 0.2, 0.2])
+    # TF-IDF cosine between preferred role and job text that counts as a full role match
+    ROLE_FULL_MATCH_SIMILARITY = 0.25
+    ROLE_QUERY_CACHE_SIZE = 1024
+    # Compact the job index in the background once this share of rows are tombstones
+    COMPACTION_TOMBSTONE_RATIO = 0.2
+    COMPACTION_MIN_TOMBSTONES = 100
+    # Bump when the snapshot layout or anything baked into it changes
+    SNAPSHOT_VERSION = 3
+    # Snapshots include live The Muse postings, so they expire even if local sources are unchanged
+    SNAPSHOT_MAX_AGE = 6 * 3600
+    TRAIN_SAMPLES = 5000
+    # Corpus columns train() reads (descriptions only matter through search_text)
+    CORPUS_COLUMNS = JobIndex.COLUMNS + ['skills', 'search_text', 'is_active']
+    # Upper bound on non-zeros of the profiles x jobs products computed at once by match_many
+    BATCH_MAX_NONZEROS = 2_000_000
+    # Match result cache bounds (profiles cached, total result payloads held)
+    MATCH_CACHE_SIZE = 512
+    MATCH_CACHE_MAX_RESULTS = 50_000
+    # Ranked snapshots behind pagination cursors (see match_page)
+    RANKED_SNAPSHOTS = 64
+    RANKED_SNAPSHOT_TTL = 300
+    # Payloads built per step by iter_matches (the first chunk is selected without a full sort)
+    MATCH_STREAM_CHUNK = 50
+    # Skills without a predefined weight get 1.0 + DEMAND_WEIGHT_RANGE * (share / top share)
+    DEMAND_WEIGHT_RANGE = 0.5
+    # Paged corpus matches are scored by a pool of SHARD_WORKERS processes (see sharded_matcher)
+    # once the index has SHARD_MIN_JOBS rows. Opt-in: the default single worker disables
+    # sharding and forks nothing. After a failed sharded call, matching stays single-process
+    # for SHARD_RETRY_SECONDS
+    SHARD_MIN_JOBS = int(os.getenv('MATCHER_SHARD_MIN_JOBS', 250_000))
+    SHARD_WORKERS = int(os.getenv('MATCHER_SHARD_WORKERS', 1))
+    SHARD_RETRY_SECONDS = int(os.getenv('MATCHER_SHARD_RETRY_SECONDS', 60))
+
+    @classmethod
+    def shard_scorer(cls):
+        """
+        Started ShardedScorer for CareerMatcher(sharded=...), or None if sharding is off.
+        Forks the workers, so call it before the process starts any other thread.
+        """
+        return ShardedScorer(cls.SHARD_WORKERS).start() if cls.SHARD_WORKERS > 1 else None
+
+    def __init__(self, data_engine, sharded=None):
         self.data_engine = data_engine
         self.df = None
         self.tfidf = None
-        self.tfidf_matrix = None
+        # Compiled job store used for scoring (built at train time)
+        self.job_index = None
+        self._role_queries = OrderedDict()
+        self._role_queries_lock = threading.Lock()
+        # Bumped on every change to the job index (train, add/update/deactivate, compaction)
+        self.index_version = 0
+        self._index_lock = threading.RLock()
+        self._compacting = False
+        # Ranked results per (profile fingerprint, index_version)
+        self.match_cache = MatchCache(self.MATCH_CACHE_SIZE, self.MATCH_CACHE_MAX_RESULTS)
+        self.ranked_snapshots = RankedSnapshots(self.RANKED_SNAPSHOTS, self.RANKED_SNAPSHOT_TTL)
+        self.sharded = sharded
+        self._shards_retry_at = 0.0
+        # Persisted matcher state (one subdirectory per source fingerprint)
+        self.snapshot_dir = os.path.join(getattr(data_engine, 'data_path', 'data'), 'matcher_snapshot')
         # Weights from the prompt
         self.weights = {
             'skill_fit': 0.40,
@@ -19,8 +122,8 @@ class CareerMatcher:
             'personality_support': 0.10,
             'market_demand': 0.10
         }
-        # Initialize ML Engine
-        self.ml_matcher = MLMatcher()
+        # Initialize ML Engine (the forest is trained or loaded from this file on first use)
+        self.ml_matcher = MLMatcher(model_path=os.path.join(getattr(data_engine, 'data_path', 'data'), 'ml_model.pkl'))
         # Predefined Skill Weights (Market Demand / Importance)
         self.skill_weights = {
             'python': 1.5, 'java': 1.3, 'react': 1.4, 'sql': 1.2,
@@ -29,41 +132,42 @@ class CareerMatcher:
             'node': 1.4, 'typescript': 1.4, 'terraform': 1.7, 'go': 1.6,
             'rust': 1.5, 'c++': 1.4, 'mongodb': 1.3, 'postgres': 1.3, 'graphql': 1.2
         }
+        # Demand-derived weights for every other skill, frozen per index build (see train)
+        self.demand_weights = {}
+
+    def train(self, use_snapshot=True):
+        """
+        Pre-computes TF-IDF and loads data from both CSV and MongoDB.
+        With use_snapshot, a snapshot matching the current source fingerprint is mapped
+        instead, and a fresh build is saved as the new snapshot.
+        """
+        with span('train'):
+            self._train(use_snapshot)
+
+    def _train(self, use_snapshot):
+        with span('train.fingerprint'):
+            fingerprint = self.source_fingerprint() if use_snapshot else None
+        if use_snapshot:
+            with span('train.load_snapshot'):
+                if self.load_snapshot(fingerprint):
+                    return
 
-    def train(self):
-        """Pre-computes TF-IDF and loads data from both CSV and MongoDB."""
         # Load CSV jobs
-        self.df = self.data_engine.load_data(samples=5000)
-        # self.data_engine.save_processed(self.df) # removed caching for now as it caused issues
+        with span('train.load_data'):
+            self.df = self.data_engine.load_data(samples=self.TRAIN_SAMPLES, columns=self.CORPUS_COLUMNS)
         
         # Load MongoDB jobs and merge
         try:
-            from database import jobs_collection, company_profiles_collection
-            from bson import ObjectId
+            from database import jobs_collection
             
-            mongo_jobs = list(jobs_collection.find({'is_active': True}))
+            with span('train.mongo'):
+                mongo_jobs = list(jobs_collection.find({'is_active': True}))
             
             if mongo_jobs:
                 print(f"Loading {len(mongo_jobs)} jobs from MongoDB...")
                 
                 # Convert MongoDB jobs to DataFrame format
-                mongo_rows = []
-                for job in mongo_jobs:
-                    # Get company info
-                    company = company_profiles_collection.find_one({'_id': ObjectId(job['company_id'])})
-                    company_name = company['company_name'] if company else 'Unknown Company'
-                    
-                    mongo_rows.append({
-                        'job_id': str(job['_id']),
-                        'title': job['title'],
-                        'company': company_name,
-                        'description': job['description'],
-                        'location': job.get('location', 'Remote'),
-                        'formatted_experience_level': job.get('experience_level', 'entry'),
-                        'mapped_skills': job.get('mapped_skills') or job.get('skills') or [],
-                        'search_text': f"{job['title']} {job['description']} {' '.join(job.get('mapped_skills') or job.get('skills') or [])}",
-                        'source': 'mongodb'
-                    })
+                mongo_rows = [self._mongo_job_record(job) for job in mongo_jobs]
                 
                 mongo_df = pd.DataFrame(mongo_rows)
                 
@@ -79,41 +183,236 @@ class CareerMatcher:
             print("Continuing with CSV jobs only...")
         
         print("Training intelligence models...")
-        self.tfidf = TfidfVectorizer(stop_words='english', max_features=5000)
-        self.df['search_text'] = self.df['search_text'].fillna('')
-        self.df['search_text'] = self.df['search_text'].fillna('')
-        self.tfidf_matrix = self.tfidf.fit_transform(self.df['search_text'])
+        with span('train.tfidf'):
+            self.tfidf = TfidfVectorizer(stop_words='english', max_features=5000)
+            self.df['search_text'] = self.df['search_text'].fillna('')
+            self.df['search_text'] = self.df['search_text'].fillna('')
+            tfidf_matrix = self.tfidf.fit_transform(self.df['search_text'])
+            with self._role_queries_lock:
+                self._role_queries.clear()
+        
+        # Compile job skill index for vectorized scoring (the index owns the TF-IDF rows)
+        with span('train.index'):
+            job_index = self._new_index().extend_dataframe(self.df, text_matrix=tfidf_matrix)
+        # Derive skill weights from corpus demand (predefined weights act as priors)
+        with span('train.weights'):
+            demand_weights = self._demand_weights(job_index.demand)
+            job_index.skill_weight = lambda skill: self._skill_weight(skill, demand_weights)
+            job_index.reweight()
+        with self._index_lock:
+            self.demand_weights = demand_weights
+            job_index.skill_weight = self.get_skill_weight
+            self.job_index = job_index
+            self.index_version += 1
         
-        # Train ML Model
-        self.ml_matcher.train()
+        if use_snapshot:
+            with span('train.save_snapshot'):
+                self.save_snapshot(fingerprint)
         print("Models trained.")
 
-    def normalize_skills(self, skill_list):
-        """Normalize skills to lowercase and map synonyms for better matching."""
-        synonyms = {
-            'js': 'javascript',
-            'reactjs': 'react',
-            'react.js': 'react',
-            'node.js': 'node',
-            'nodejs': 'node',
-            'py': 'python',
-            'ml': 'machine learning',
-            'ai': 'artificial intelligence',
-            'aws': 'amazon web services',
-            'excel': 'microsoft excel'
+    def source_fingerprint(self):
+        """
+        Content fingerprint of everything train() builds from: local CSV sources, active
+        MongoDB jobs and the scoring settings baked into the index.
+        """
+        digest = hashlib.sha256()
+        settings = {
+            'version': self.SNAPSHOT_VERSION,
+            'samples': self.TRAIN_SAMPLES,
+            'skill_weights': self.skill_weights,
+            'experience_levels': self.EXPERIENCE_LEVELS
         }
+        digest.update(json.dumps(settings, sort_keys=True).encode())
+        digest.update(self.data_engine.source_fingerprint().encode())
+        try:
+            from database import jobs_collection
+            mongo_jobs = sorted(jobs_collection.find({'is_active': True}), key=lambda job: str(job.get('_id')))
+            for job in mongo_jobs:
+                digest.update(json.dumps(job, sort_keys=True, default=str).encode())
+        except Exception as e:
+            digest.update(f"mongo-unavailable:{type(e).__name__}".encode())
+        return digest.hexdigest()
+
+    def save_snapshot(self, fingerprint):
+        """
+        Writes the job index (columns, CSR skill/TF-IDF arrays, vocabulary, posting lists),
+        the fitted vectorizer and demand weights to snapshot_dir/<fingerprint>.
+        The directory is written under a temporary name and renamed into place, and
+        snapshots of older fingerprints are removed.
+        """
+        saved = {}
+
+        def write(path):
+            with self._index_lock:
+                if self.job_index is None:
+                    return False
+                self.job_index.save(path)
+                saved['jobs'] = len(self.job_index)
+            with open(os.path.join(path, 'models.pkl'), 'wb') as f:
+                pickle.dump({'tfidf': self.tfidf, 'demand_weights': self.demand_weights},
+                            f, protocol=pickle.HIGHEST_PROTOCOL)
+            manifest = {
+                'version': self.SNAPSHOT_VERSION,
+                'fingerprint': fingerprint,
+                'created_at': time.time(),
+                'jobs': saved['jobs']
+            }
+            with open(os.path.join(path, 'manifest.json'), 'w') as f:
+                json.dump(manifest, f)
+
+        if not save_directory(self.snapshot_dir, fingerprint, write, 'matcher snapshot'):
+            return False
+        print(f"Saved matcher snapshot ({saved['jobs']} jobs).")
+        return True
+
+    def load_snapshot(self, fingerprint):
+        """
+        Maps the snapshot for a source fingerprint instead of rebuilding.
+        Returns False (leaving the matcher untouched) if it is missing, stale or unreadable.
+        """
+        path = os.path.join(self.snapshot_dir, fingerprint)
+        try:
+            with open(os.path.join(path, 'manifest.json')) as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if manifest.get('version') != self.SNAPSHOT_VERSION or manifest.get('fingerprint') != fingerprint:
+            return False
+        if time.time() - manifest.get('created_at', 0) > self.SNAPSHOT_MAX_AGE:
+            print("Matcher snapshot expired, rebuilding...")
+            return False
+
+        try:
+            with open(os.path.join(path, 'models.pkl'), 'rb') as f:
+                models = pickle.load(f)
+            job_index = JobIndex.load(path, self.normalize_skills, self.get_skill_weight,
+                                      self.EXPERIENCE_LEVELS, vectorizer=models['tfidf'])
+        except Exception as e:
+            print(f"Could not load matcher snapshot: {e}")
+            return False
+
+        self.tfidf = models['tfidf']
+        self.df = None
+        with self._role_queries_lock:
+            self._role_queries.clear()
+        with self._index_lock:
+            self.demand_weights = models['demand_weights']
+            self.job_index = job_index
+            self.index_version += 1
+        print(f"✅ Loaded matcher snapshot ({len(job_index)} jobs).")
+        return True
+
+    @property
+    def tfidf_matrix(self):
+        """TF-IDF rows of the indexed jobs (kept in the job index so incremental adds show up)."""
+        return self.job_index.text_matrix if self.job_index is not None else None
+
+    def _mongo_job_record(self, job):
+        """Converts a MongoDB job document (or a JobSyncer posting) to the matcher's row format."""
+        company_name = job.get('company_name')
+        if not company_name:
+            from database import company_profiles_collection
+            try:
+                from bson import ObjectId
+                company = company_profiles_collection.find_one({'_id': ObjectId(job['company_id'])})
+            except Exception:
+                company = company_profiles_collection.find_one({'_id': str(job.get('company_id'))})
+            company_name = company['company_name'] if company else 'Unknown Company'
         
+        skills = job.get('mapped_skills') or job.get('skills') or []
+        return {
+            'job_id': str(job.get('job_id') or job['_id']),
+            'title': job['title'],
+            'company': company_name,
+            'description': job['description'],
+            'location': job.get('location', 'Remote'),
+            'formatted_experience_level': job.get('experience_level', 'entry'),
+            'mapped_skills': skills,
+            'search_text': f"{job['title']} {job['description']} {' '.join(skills)}",
+            'source': 'mongodb'
+        }
+
+    # ========== INCREMENTAL UPDATES ==========
+
+    def add_job(self, job):
+        """
+        Adds a newly posted job (MongoDB document format) to the live index without retraining.
+        Its text is transformed with the already-fitted TF-IDF vocabulary.
+        Returns False if the matcher has not been trained yet.
+        """
+        if self.job_index is None:
+            return False
+        record = self._mongo_job_record(job)
+        with self._index_lock:
+            # Re-posting an indexed job replaces it
+            self.job_index.deactivate(record['job_id'])
+            self.job_index.extend_records([record])
+            self.index_version += 1
+        self._maybe_compact()
+        return True
+
+    def update_job(self, job):
+        """Replaces an indexed job with its new version (tombstone + append)."""
+        if not job.get('is_active', True):
+            return self.deactivate_job(job.get('job_id') or job['_id'])
+        return self.add_job(job)
+
+    def deactivate_job(self, job_id):
+        """Removes a job from matching. Its row is tombstoned and reclaimed by compaction."""
+        if self.job_index is None:
+            return False
+        with self._index_lock:
+            removed = self.job_index.deactivate(job_id)
+            if removed:
+                self.index_version += 1
+        if removed:
+            self._maybe_compact()
+        return removed
+
+    def _maybe_compact(self):
+        """Starts a background compaction when tombstones exceed COMPACTION_TOMBSTONE_RATIO."""
+        index = self.job_index
+        if (self._compacting or index.tombstones < self.COMPACTION_MIN_TOMBSTONES
+                or index.tombstones < self.COMPACTION_TOMBSTONE_RATIO * len(index)):
+            return
+        self._compacting = True
+        threading.Thread(target=self._compact, daemon=True).start()
+
+    def _compact(self):
+        """Rebuilds the index without tombstones, then replays changes made meanwhile and swaps it in."""
+        try:
+            with self._index_lock:
+                index = self.job_index
+                size = len(index)
+                kept = index.active_rows()
+                text_matrix = index.text_matrix
+            
+            compacted = index.compacted(kept, text_matrix)
+            
+            with self._index_lock:
+                if self.job_index is not index:
+                    return # Retrained meanwhile
+                # Jobs deactivated while compacting
+                for row in kept[~index.active[kept]]:
+                    compacted.deactivate(index.columns['job_id'][row])
+                # Jobs added while compacting
+                added = np.arange(size, len(index))
+                compacted.copy_rows(index, added[index.active[added]])
+                self.job_index = compacted
+                self.index_version += 1
+            print(f"Job index compacted: {size} -> {len(compacted)} rows")
+        except Exception as e:
+            print(f"Job index compaction failed: {e}")
+        finally:
+            self._compacting = False
+
+    def normalize_skills(self, skill_list):
+        """Normalize skills to lowercase and map synonyms for better matching."""
         normalized = set()
         for s in skill_list:
             # Handle both string and dict formats
             skill_name = s['name'] if isinstance(s, dict) else s
-            clean = skill_name.lower().strip()
-            
-            # Check direct map
-            if clean in synonyms:
-                normalized.add(synonyms[clean])
-            else:
-                normalized.add(clean)
+            normalized.add(normalize_skill(skill_name))
                 
         return normalized
     
@@ -135,9 +434,61 @@ class CareerMatcher:
         return proficiency_map.get(skill.get('proficiency', 'intermediate'), 0.7)
 
     def get_skill_weight(self, skill_name):
-        """Get relative weight of a skill, default to 1.0"""
-        norm_skill = list(self.normalize_skills([skill_name]))[0]
-        return self.skill_weights.get(norm_skill, 1.0)
+        """Get relative weight of a skill: predefined weight, else demand-derived, default to 1.0"""
+        return self._skill_weight(skill_name, self.demand_weights)
+
+    def _skill_weight(self, skill_name, demand_weights):
+        if isinstance(skill_name, dict):
+            skill_name = skill_name['name']
+        skill = normalize_skill(skill_name)
+        weight = self.skill_weights.get(skill)
+        return weight if weight is not None else demand_weights.get(skill, 1.0)
+
+    def _demand_weights(self, demand):
+        """Weights of skills without a predefined weight, scaled by their share of the corpus."""
+        counts = {skill: count for skill, count in demand.counts.items() if skill not in self.skill_weights and count > 0}
+        if not counts:
+            return {}
+        top = max(counts.values())
+        return {skill: 1.0 + self.DEMAND_WEIGHT_RANGE * count / top for skill, count in counts.items()}
+
+    def skill_demand(self, cluster=None, level=None, top=20):
+        """
+        Most demanded skills overall, in a role cluster, at an experience level (name), or
+        in a cluster at a level. Raises ValueError for unknown clusters or levels.
+        """
+        if cluster and cluster not in CLUSTER_NAMES:
+            raise ValueError(f"Unknown role cluster '{cluster}' (one of: {', '.join(CLUSTER_NAMES)})")
+        level_code = None
+        if level:
+            level_code = self.EXPERIENCE_LEVELS.get(level)
+            if level_code is None:
+                raise ValueError(f"Unknown experience level '{level}' (one of: {', '.join(self.EXPERIENCE_LEVELS)})")
+        cluster = cluster or None
+        with self._index_lock:
+            if self.job_index is None:
+                return {'jobs': 0, 'skills': [], 'clusters': {}, 'levels': {}}
+            demand = self.job_index.demand
+            level_names = {}
+            for name, code in self.EXPERIENCE_LEVELS.items():
+                level_names.setdefault(code, name)
+            return {
+                'jobs': demand.job_count(cluster, level_code),
+                'skills': demand.top(top, cluster=cluster, level=level_code),
+                'clusters': {c: n for c, n in demand.cluster_jobs.items() if n > 0},
+                'levels': {level_names.get(code, str(code)): n for code, n in demand.level_jobs.items() if n > 0}
+            }
+
+    def build_user_skill_map(self, user_skills):
+        """Map each normalized user skill to its confidence (0-1)."""
+        user_skill_map = {}
+        for skill in user_skills:
+            if isinstance(skill, dict):
+                user_skill_map[normalize_skill(skill['name'])] = self.calculate_skill_confidence(skill)
+            else:
+                # Legacy string format
+                user_skill_map[normalize_skill(skill)] = 0.6
+        return user_skill_map
 
     def calculate_skill_score(self, user_skills, job_skills):
         """
@@ -150,20 +501,11 @@ class CareerMatcher:
         if not job_set:
             return 0.0, [], 0.0  # Zero score if job has no skills listed (unlikely with extraction)
         
-        # Build user skill map with confidence
-        user_skill_map = {}
-        for skill in user_skills:
-            if isinstance(skill, dict):
-                normalized_name = list(self.normalize_skills([skill['name']]))[0]
-                user_skill_map[normalized_name] = self.calculate_skill_confidence(skill)
-            else:
-                # Legacy string format
-                normalized_name = list(self.normalize_skills([skill]))[0]
-                user_skill_map[normalized_name] = 0.6
+        user_skill_map = self.build_user_skill_map(user_skills)
         
         user_set = set(user_skill_map.keys())
         
-        # Calculate Weighted Totals
+        # Calculate Weighted Totals (job_set is already normalized)
         total_job_weight = sum(self.get_skill_weight(s) for s in job_set)
         matched_job_weight = 0
         confidence_weighted_match = 0
@@ -197,19 +539,8 @@ class CareerMatcher:
         user_level: 'Entry', 'Associate', 'Mid-Senior', 'Director'
         job_level: string from dataset
         """
-        # Map levels to numeric for distance calculation
-        levels = {
-            'Internship': 0,
-            'Entry level': 1,
-            'Associate': 2,
-            'Mid-Senior level': 3,
-            'Director': 4,
-            'Executive': 5,
-            'Not Specified': 1 # Assume entry level if unknown
-        }
-        
-        u_val = levels.get(user_level, 1)
-        j_val = levels.get(job_level, 1) # Default to 1
+        u_val = self.EXPERIENCE_LEVELS.get(user_level, 1)
+        j_val = self.EXPERIENCE_LEVELS.get(job_level, 1) # Default to 1
         
         diff = abs(u_val - j_val)
         
@@ -237,115 +568,851 @@ class CareerMatcher:
             
         return questions
 
-    def match_user(self, profile, live_jobs=None):
+    def _new_index(self):
+        """Creates an empty JobIndex using this matcher's normalization and skill weights."""
+        return JobIndex(self.normalize_skills, self.get_skill_weight, self.EXPERIENCE_LEVELS, vectorizer=self.tfidf)
+
+    def _role_query(self, target_role):
+        """TF-IDF vector of a preferred role, cached per distinct role string."""
+        with self._role_queries_lock:
+            query = self._role_queries.get(target_role)
+            if query is not None:
+                self._role_queries.move_to_end(target_role)
+                return query
+        tfidf = self.tfidf
+        query = tfidf.transform([target_role])
+        with self._role_queries_lock:
+            # Not cached if the vectorizer was replaced (and the cache cleared) meanwhile
+            if self.tfidf is tfidf:
+                self._role_queries[target_role] = query
+                if len(self._role_queries) > self.ROLE_QUERY_CACHE_SIZE:
+                    self._role_queries.popitem(last=False)
+        return query
+
+    def _role_scores_for_rows(self, index, target_role, rows=None):
+        """
+        Role alignment of the given rows (all rows if None): cosine similarity between the
+        preferred role and the jobs' TF-IDF search text, see _role_from_text. Every job is
+        a full match without a preferred role and none is without a vectorizer.
+        """
+        count = len(index) if rows is None else len(rows)
+        if not target_role:
+            return np.ones(count)
+        if self.tfidf is None or index.text_matrix.shape[1] == 0 or count == 0:
+            return np.zeros(count)
+        text = index.text_matrix if rows is None else index.text_matrix[rows]
+        return self._role_from_text(text, self._role_query(target_role))
+
+    @classmethod
+    def _role_from_text(cls, text, role_query):
+        """Role scores of TF-IDF rows against a role query (one linear_kernel)."""
+        return cls._role_from_similarity(linear_kernel(text, role_query).ravel())
+
+    @classmethod
+    def _role_from_similarity(cls, similarity):
+        """Scales cosine similarities so that ROLE_FULL_MATCH_SIMILARITY or more counts as a full match."""
+        return np.minimum(similarity / cls.ROLE_FULL_MATCH_SIMILARITY, 1.0)
+
+    def _candidate_rows(self, index, user_skill_map, role_scores):
+        """
+        Rows sharing at least one skill with the user (from the skill posting lists) or with
+        a non-zero role alignment. Every other job has a known default score.
+        """
+        postings = [index.skill_rows(skill) for skill in user_skill_map]
+        if role_scores is not None:
+            postings.append(np.flatnonzero(role_scores))
+        if not postings:
+            return np.empty(0, dtype=np.int64)
+        rows = np.unique(np.concatenate(postings).astype(np.int64))
+        return rows[index.active[rows]]
+
+    def _skill_sums(self, index, user_skill_map, rows):
+        """
+        For the given rows of a JobIndex: total importance weight of the job skills the user
+        has, and the same weights multiplied by the user's confidence in each skill.
+        """
+        has_skill, confidence = self._skill_vectors(index, user_skill_map)
+        matrix = index.skill_matrix[rows]
+        return matrix @ has_skill, matrix @ confidence
+
+    @staticmethod
+    def _skill_vectors(index, user_skill_map):
+        """Dense vectors over the index skill vocabulary: 1.0 for the user's skills, and their confidence."""
+        has_skill = np.zeros(len(index.skill_names))
+        confidence = np.zeros(len(index.skill_names))
+        for skill, conf in user_skill_map.items():
+            idx = index.skill_vocab.get(skill)
+            if idx is not None:
+                has_skill[idx] = 1.0
+                confidence[idx] = conf
+        return has_skill, confidence
+
+    @staticmethod
+    def _skill_scores(total_weight, matched_weight, confidence_weighted):
+        """
+        Vectorized equivalent of calculate_skill_score from per-job weight sums.
+        Returns: (base_skill_scores, weighted_skill_scores)
+        """
+        coverage = np.divide(matched_weight, total_weight,
+                             out=np.zeros_like(matched_weight), where=total_weight > 0)
+        confidence_factor = np.divide(confidence_weighted, matched_weight,
+                                      out=np.zeros_like(matched_weight), where=matched_weight > 0)
+        return np.minimum(coverage, 1.0), np.minimum(coverage * (0.7 + 0.3 * confidence_factor), 1.0)
+
+    def _experience_scores_by_code(self, profile):
+        """Experience fit for every level code, given the user's level."""
+        user_level = self.EXPERIENCE_LEVELS.get(profile.get('experience_level', 'Entry Level'), 1)
+        distance = np.abs(np.arange(max(self.EXPERIENCE_LEVELS.values()) + 1) - user_level)
+        return self.EXPERIENCE_DISTANCE_SCORES[np.minimum(distance, len(self.EXPERIENCE_DISTANCE_SCORES) - 1)]
+
+    @staticmethod
+    def _target_role(profile):
+        return (profile.get('preferred_role') or '').lower().strip()
+
+    def _score_pool(self, index, profile, user_skill_map, top_k=None, min_score=None):
+        """
+        Scores the jobs that can appear in the first top_k ranks.
+        Jobs overlapping the user's skills or the preferred role get a full score; every other
+        job gets the default score (no skill match, no role match, experience by level), which
+        only depends on its level, so with top_k only the first top_k rows per level are kept.
+        min_score: keep only jobs whose displayed readiness_score is at least min_score
+        (see _threshold_pool).
+        Returns: (rows, base, weighted, exp, role, readiness), rows ascending.
+        """
+        if min_score is not None:
+            pool = self._threshold_pool(index, profile, user_skill_map, min_score)
+            if pool is None:
+                pool = self._score_pool(index, profile, user_skill_map)
+            keep = np.flatnonzero(self._display_scores(pool[-1]) >= min_score)
+            return tuple(column[keep] for column in pool)
+        
+        target_role = self._target_role(profile)
+        if top_k is not None and self._use_shards(index):
+            try:
+                return self._sharded_pool(index, profile, user_skill_map, target_role, top_k)
+            except Exception as e:
+                self._shards_failed(e)
+        # No preferred role means no role preference: every job counts as aligned
+        role_scores = self._role_scores_for_rows(index, target_role) if target_role else None
+        candidates = self._candidate_rows(index, user_skill_map, role_scores)
+        matched, confidence_weighted = self._skill_sums(index, user_skill_map, candidates)
+        role = role_scores[candidates] if role_scores is not None else None
+        return self._pool(index, profile, candidates, matched, confidence_weighted, role, top_k)
+
+    def _threshold_pool(self, index, profile, user_skill_map, min_score):
+        """
+        Scores only the jobs whose readiness upper bound reaches min_score, or returns None
+        when the threshold is too low to prune (jobs without a shared skill can reach it).
+        Bounds, cheapest first: skill coverage as if the job required every user skill it
+        could (user skill weight / job total weight), exact experience and a full role match;
+        then the exact skill term with a full role match. Role similarity is computed for
+        the remaining rows only.
+        """
+        # Lowest readiness that still displays as min_score after rounding to 0.1
+        cutoff = (min_score - 0.05) / 100 - 1e-9
+        model = self.ml_matcher
+        exp_by_code = self._experience_scores_by_code(profile)
+        if model.EXPERIENCE_WEIGHT * exp_by_code.max() + model.ROLE_WEIGHT >= cutoff:
+            return None
+        
+        # 1. Only jobs sharing a skill with the user can pass (weighted skill score > 0)
+        postings = [index.skill_rows(skill) for skill in user_skill_map]
+        rows = np.unique(np.concatenate(postings).astype(np.int64)) if postings else np.empty(0, dtype=np.int64)
+        rows = rows[index.active[rows]]
+        
+        # 2. Coverage bound from the user's total skill weight
+        has_skill, confidence = self._skill_vectors(index, user_skill_map)
+        user_weight = float(index.vocab_weights[np.flatnonzero(has_skill)].sum())
+        max_confidence = max(user_skill_map.values(), default=0.0)
+        total = index.total_weight[rows]
+        coverage = np.minimum(np.divide(user_weight, total, out=np.zeros(len(rows)), where=total > 0), 1.0)
+        exp = exp_by_code[index.experience_codes[rows]]
+        bound = (model.SKILL_WEIGHT * np.minimum(coverage * (0.7 + 0.3 * max_confidence), 1.0) +
+                 model.EXPERIENCE_WEIGHT * exp + model.ROLE_WEIGHT)
+        rows, exp = rows[bound >= cutoff], exp[bound >= cutoff]
+        
+        # 3. Exact skill scores, still assuming a full role match
+        matrix = index.skill_matrix[rows]
+        base, weighted = self._skill_scores(index.total_weight[rows], matrix @ has_skill, matrix @ confidence)
+        keep = model.SKILL_WEIGHT * weighted + model.EXPERIENCE_WEIGHT * exp + model.ROLE_WEIGHT >= cutoff
+        rows, base, weighted, exp = rows[keep], base[keep], weighted[keep], exp[keep]
+        
+        # 4. Role alignment for the survivors
+        role = self._role_scores_for_rows(index, self._target_role(profile), rows)
+        
+        readiness = self.ml_matcher.predict_batch(weighted, exp, role)
+        return rows, base, weighted, exp, role, readiness
+
+    def _use_shards(self, index):
+        return (self.sharded is not None and index is self.job_index and len(index) >= self.SHARD_MIN_JOBS
+                and time.time() >= self._shards_retry_at)
+
+    def _shards_failed(self, error):
+        """
+        Falls back to single-process scoring for SHARD_RETRY_SECONDS, then shards again.
+        Dead workers are not replaced (forking a threaded process can deadlock), so a broken
+        pool keeps matching single-process until restart.
+        """
+        sharded = self.sharded
+        if sharded is None:
+            return
+        if isinstance(error, BrokenExecutor):
+            print(f"⚠️ Shard workers died, matching single-process until restart: {error}")
+            self.sharded = None
+            sharded.close()
+        else:
+            print(f"⚠️ Sharded matching failed, single-process for {self.SHARD_RETRY_SECONDS}s: {error}")
+            self._shards_retry_at = time.time() + self.SHARD_RETRY_SECONDS
+            sharded.reset()
+
+    def _sharded_pool(self, index, profile, user_skill_map, target_role, top_k):
+        """_score_pool for the top_k ranks only, scored by the shard workers."""
+        has_skill, confidence = self._skill_vectors(index, user_skill_map)
+        role_query = None
+        if target_role and self.tfidf is not None:
+            role_query = self._role_query(target_role)
+        # Without a vectorizer a preferred role matches nothing (see _role_scores_for_rows)
+        default_role = 0.0 if target_role else 1.0
+        return self.sharded.score(index, has_skill, confidence, self._experience_scores_by_code(profile),
+                                  role_query, default_role, top_k)
+
+    def _pool(self, index, profile, candidates, matched, confidence_weighted, candidate_role, top_k=None):
+        """
+        Completes _score_pool from the overlap of one profile with the index: the candidate
+        rows (ascending, active), their skill weight sums and role scores (None = no role).
+        """
+        default_role = 0.0 if candidate_role is not None else 1.0
+        exp_by_code = self._experience_scores_by_code(profile)
+        
+        codes = index.experience_codes
+        if top_k is None:
+            rows = index.active_rows()
+        else:
+            fillers = []
+            for level_rows in index.level_rows.values():
+                head = level_rows.view()[:top_k + len(candidates) + index.tombstones]
+                head = head[index.active[head]]
+                fillers.append(head[~np.isin(head, candidates)][:top_k])
+            # Fillers exclude candidates and levels are disjoint, so a sort is enough
+            rows = np.sort(np.concatenate([candidates] + fillers).astype(np.int64))
+        
+        base = np.zeros(len(rows))
+        weighted = np.zeros(len(rows))
+        exp = exp_by_code[codes[rows]]
+        role = np.full(len(rows), default_role)
+        
+        if len(candidates):
+            at = np.searchsorted(rows, candidates)
+            base[at], weighted[at] = self._skill_scores(index.total_weight[candidates], matched, confidence_weighted)
+            if candidate_role is not None:
+                role[at] = candidate_role
+        
+        # ========== READINESS FORMULA ==========
+        readiness = self.ml_matcher.predict_batch(weighted, exp, role)
+        return rows, base, weighted, exp, role, readiness
+
+    def _build_result(self, job, base_skill_score, weighted_skill_score, exp_score, role_score,
+                      readiness_score, missing_skills):
+        """Builds the full match payload (category, best action, breakdown) for one job."""
+        # ========== INTELLIGENCE LAYER ==========
+        
+        # 1. Classify job readiness
+        job_category = self.classify_job(readiness_score)
+        
+        # 2. Recommend single best action
+        best_action = self.recommend_best_action(missing_skills, job.get('mapped_skills', []))
+        
+        # 3. Explain readiness score (weights of the readiness formula)
+        model = self.ml_matcher
+        readiness_explanation = {
+            'overall': round(readiness_score * 100, 1),
+            'breakdown': [
+                {'label': 'Skills', 'value': round(base_skill_score * 100), 'weight': model.SKILL_WEIGHT},
+                {'label': 'Experience', 'value': round(exp_score * 100), 'weight': model.EXPERIENCE_WEIGHT},
+                {'label': 'Role Fit', 'value': round(role_score * 100), 'weight': model.ROLE_WEIGHT}
+            ]
+        }
+
+        return {
+            'job_id': str(job.get('job_id') or job.get('_id') or 'unknown'),
+            'title': str(job.get('title', 'Unknown Role')),
+            'company': str(job.get('company_name') or job.get('company') or 'Company'),
+            'location': str(job.get('location', 'Remote')),
+            'readiness_score': float(round(readiness_score * 100, 1)), # Used for display
+            'match_score': float(round(readiness_score * 100, 1)), # Logic compatibility
+            'weighted_skill_score': weighted_skill_score,
+            'missing_skills': missing_skills[:5],
+            'required_skills': job.get('mapped_skills', []),
+            'experience_level': str(job.get('formatted_experience_level', 'Entry')),
+            'salary': str(job.get('salary_disp', 'Competitive')),
+            'category': job_category,
+            'best_action': best_action,
+            'readiness_breakdown': readiness_explanation,
+            'source': job.get('source', 'csv')
+        }
+
+    @staticmethod
+    def _rank(scores, top_k=None, offset=0):
+        """
+        Indices ordered by descending score (ties keep corpus order), sliced to
+        [offset, offset + top_k). Uses a partial selection when only the head is needed.
+        """
+        n = len(scores)
+        offset = max(0, offset or 0)
+        if top_k is None or offset + top_k >= n:
+            order = np.argsort(-scores, kind='stable')
+            return order[offset:] if top_k is None else order[offset:offset + top_k]
+        
+        k = offset + top_k
+        if top_k <= 0:
+            return np.array([], dtype=np.int64)
+        kth = np.partition(scores, n - k)[n - k] # k-th largest score
+        above = np.flatnonzero(scores > kth)
+        ties = np.flatnonzero(scores == kth)[:k - len(above)]
+        chosen = np.sort(np.concatenate([above, ties]))
+        chosen = chosen[np.argsort(-scores[chosen], kind='stable')]
+        return chosen[offset:k]
+
+    def _match_index(self, index, profile, top_k=None, offset=0, min_score=None):
+        """Scores a JobIndex and builds payloads for the requested page only."""
+        if len(index) == index.tombstones:
+            return []
+        
+        user_skill_map = self.build_user_skill_map(profile['skills'])
+        page_end = None if top_k is None else max(0, offset or 0) + top_k
+        with span('match.score'):
+            pool = self._score_pool(index, profile, user_skill_map, page_end, min_score)
+        return self._page_results(index, user_skill_map, pool, top_k, offset)
+
+    def _page_results(self, index, user_skill_map, pool, top_k=None, offset=0):
+        """Ranks a scored pool and materializes the payloads of ranks [offset, offset + top_k)."""
+        rows, base, weighted, exp, role, readiness = pool
+        
+        # Rank on the displayed (rounded) score, then materialize only the returned page
+        with span('match.rank'):
+            selected = self._rank(self._display_scores(readiness), top_k, offset)
+        
+        results = []
+        with span('match.payloads'):
+            for i in selected:
+                row = rows[i]
+                missing_skills = [index.skill_names[k] for k in index.skill_ids(row) if index.skill_names[k] not in user_skill_map]
+                results.append(self._build_result(
+                    index.record(row), float(base[i]), float(weighted[i]), float(exp[i]), float(role[i]),
+                    float(readiness[i]), missing_skills
+                ))
+        return results
+
+    def profile_fingerprint(self, profile):
+        """Hash of everything a profile contributes to scoring (normalized skills, level, role)."""
+        skill_map = self.build_user_skill_map(profile.get('skills') or [])
+        key = [sorted(skill_map.items()), str(profile.get('experience_level', 'Entry Level')), self._target_role(profile)]
+        return hashlib.sha1(json.dumps(key).encode()).hexdigest()
+
+    def average_readiness(self, profile, user_id=None):
+        """Mean readiness (0-100) over the whole corpus without building any result payloads."""
+        with self._index_lock:
+            if self.job_index is None or len(self.job_index) == self.job_index.tombstones:
+                return 0.0
+            fingerprint = self.profile_fingerprint(profile)
+            entry = self.match_cache.get(fingerprint, self.index_version)
+            if entry is not None and entry['average'] is not None:
+                return entry['average']
+            readiness = self._score_pool(self.job_index, profile, self.build_user_skill_map(profile['skills']))[-1]
+            average = float(readiness.mean() * 100)
+            self.match_cache.put(fingerprint, self.index_version, average=average, owner=user_id)
+        return average
+
+    @staticmethod
+    def _display_scores(readiness):
+        """readiness (0-1) -> percent rounded exactly like the readiness_score payload field."""
+        scaled = readiness * 100
+        tenths = scaled * 10
+        display = np.rint(tenths) / 10
+        # Values right at a .x5 boundary may round differently in binary; use Python's round for those
+        near = np.flatnonzero(np.abs(tenths - np.floor(tenths) - 0.5) < 1e-6)
+        display[near] = [round(v, 1) for v in scaled[near].tolist()]
+        return display
+
+    def match_user(self, profile, live_jobs=None, top_k=None, offset=0, user_id=None, min_score=None):
         """
         Main scoring function.
         profile: dict with keys ['skills', 'experience_level', 'preferred_role']
-        live_jobs: list of job dicts (optional). If provided, scores these instead of self.df
+        live_jobs: list of job dicts (optional). If provided, scores these instead of the trained corpus
+        top_k / offset: return only ranks [offset, offset + top_k). Full payloads are
+        built for the returned jobs only. Defaults to the full ranking.
+        user_id: owner of the profile, so its cached results are dropped when the profile
+        is updated (see MatchCache.invalidate_owner).
+        min_score: return only jobs with readiness_score >= min_score (0-100). Jobs whose
+        readiness upper bound is below it are skipped before scoring.
+        Corpus results are cached per profile fingerprint and index version; treat them as read-only.
         """
-        results = []
+        with span('match_user'):
+            return self._match_user(profile, live_jobs, top_k, offset, user_id, min_score)
+
+    def _match_user(self, profile, live_jobs, top_k, offset, user_id, min_score):
+        if live_jobs:
+            # Live jobs are compiled into a throwaway index and scored the same way
+            with span('match.compile_live_jobs'):
+                index = self._new_index().extend_records(live_jobs)
+            return self._match_index(index, profile, top_k=top_k, offset=offset, min_score=min_score)
         
-        # Determine source of jobs
-        candidates = []
+        offset = max(0, offset or 0)
+        page_end = None if top_k is None else offset + top_k
+        with self._index_lock:
+            if self.job_index is None:
+                return []
+            with span('match.cache_lookup'):
+                fingerprint = self.profile_fingerprint(profile)
+                entry = self.match_cache.get(fingerprint, self.index_version)
+            cached = entry['results'] if entry is not None else None
+            if cached is not None and (
+                    entry['complete'] or (page_end is not None and len(cached) >= page_end) or
+                    (min_score is not None and cached and cached[-1]['readiness_score'] < min_score)):
+                results = cached
+            else:
+                # Materialize the ranking up to the end of the requested page and cache it.
+                # Results above a threshold are a prefix of the ranking as well.
+                results = self._match_index(self.job_index, profile, top_k=page_end, min_score=min_score)
+                complete = min_score is None and (page_end is None or len(results) < page_end)
+                if len(results) > len(cached or ()) or complete:
+                    self.match_cache.put(fingerprint, self.index_version, results=results, complete=complete, owner=user_id)
+        if min_score is not None:
+            results = results[:self._count_at_least(results, min_score)]
+        return results[offset:] if page_end is None else results[offset:page_end]
+
+    @staticmethod
+    def _count_at_least(results, min_score):
+        """Length of the prefix of ranked results with readiness_score >= min_score."""
+        for i, result in enumerate(results):
+            if result['readiness_score'] < min_score:
+                return i
+        return len(results)
+
+    def iter_matches(self, profile, live_jobs=None, limit=None, min_score=None):
+        """
+        Generator version of match_user: yields the same payloads in rank order, building
+        them MATCH_STREAM_CHUNK at a time, so callers can send the best matches before the
+        rest of the ranking is materialized. Corpus rankings already cached are replayed.
+        The index lock is only held while scoring and while building each chunk.
+        """
         if live_jobs:
-            candidates = live_jobs
-        elif self.df is not None:
-             # Ensure no NaNs before conversion
-             clean_df = self.df.fillna('')
-             candidates = clean_df.to_dict('records')
+            index = self._new_index().extend_records(live_jobs)
+        else:
+            with self._index_lock:
+                index = self.job_index
+                if index is None:
+                    return
+                entry = self.match_cache.get(self.profile_fingerprint(profile), self.index_version)
+            if entry is not None and entry['complete'] and entry['results'] is not None:
+                results = entry['results']
+                if min_score is not None:
+                    results = results[:self._count_at_least(results, min_score)]
+                yield from results[:limit]
+                return
+        if len(index) == index.tombstones:
+            return
         
-        # Pre-compute query vec if strictly using TF-IDF locally (less relevant for live API but useful for Hybrid)
-        # For live jobs, we'll do simpler text matching for role score to avoid retraining TF-IDF every request
+        user_skill_map = self.build_user_skill_map(profile['skills'])
+        with self._index_lock:
+            with span('match.score'):
+                pool = self._score_pool(index, profile, user_skill_map, limit, min_score)
+        display = self._display_scores(pool[-1])
+        count = len(display) if limit is None else min(limit, len(display))
         
-        for job in candidates:
-            try:
-                # 1. Skill Match (Weight: 0.5)
-                # base_skill_score is strict coverage (0.0 to 1.0)
-                base_skill_score, missing_skills, weighted_skill_score = self.calculate_skill_score(
-                    profile['skills'], job.get('mapped_skills') or job.get('skills') or []
-                )
-                
-                # 2. Experience Fit (Weight: 0.3)
-                exp_score = self.calculate_experience_score(
-                    profile.get('experience_level', 'Entry Level'), 
-                    job.get('formatted_experience_level', 'Entry Level')
-                )
-                
-                # 3. Role Alignment (Weight: 0.2)
-                # If live job, simpler keyword match since TF-IDF matrix isn't built for it
-                role_score = 0.0 # Default to no match
-                target_role = profile.get('preferred_role', '').lower()
-                job_title = str(job.get('title', '')).lower()
-                
-                if target_role in job_title: 
-                    role_score = 1.0
-                elif any(word in job_title for word in target_role.split()):
-                    role_score = 0.7
-                
-                # ========== READINESS FORMULA ==========
-                # Ensure values are within [0, 1] and non-NaN
-                def clean_val(v, default=0.0):
-                    if v is None: return default
-                    try:
-                        import math
-                        import numpy as np
-                        if math.isnan(v) or np.isnan(v): return default
-                        return max(0.0, min(1.0, float(v)))
-                    except:
-                        return default
-
-                s_score = clean_val(weighted_skill_score)
-                e_score = clean_val(exp_score)
-                r_score = clean_val(role_score)
-                
-                # ML Prediction
-                readiness_score = self.ml_matcher.predict_match_probability(s_score, e_score, r_score)
-                
-                # Final check for readiness_score
-                readiness_score = clean_val(readiness_score, default=0.0)
-                # ========== INTELLIGENCE LAYER ==========
-                
-                # 1. Classify job readiness
-                job_category = self.classify_job(readiness_score)
-                
-                # 2. Recommend single best action
-                best_action = self.recommend_best_action(missing_skills, job.get('mapped_skills', []))
-                
-                # 3. Explain readiness score
-                readiness_explanation = {
-                    'overall': round(readiness_score * 100, 1),
-                    'breakdown': [
-                        {'label': 'Skills', 'value': round(base_skill_score * 100), 'weight': 0.5},
-                        {'label': 'Experience', 'value': round(exp_score * 100), 'weight': 0.3},
-                        {'label': 'Role Fit', 'value': round(role_score * 100), 'weight': 0.2}
-                    ]
-                }
+        # Best chunk first via partial selection, the remaining order only if it is consumed
+        order = self._rank(display, min(self.MATCH_STREAM_CHUNK, count))
+        done = 0
+        while done < count:
+            if done == len(order):
+                order = self._rank(display, count)
+            chunk = order[done:done + self.MATCH_STREAM_CHUNK]
+            with self._index_lock:
+                results = self._page_results(index, user_skill_map, _take(pool, chunk), None)
+            done += len(chunk)
+            yield from results
+    
+    def match_page(self, profile, cursor=None, limit=20, live_jobs=None, min_score=None, source=None):
+        """
+        Cursor pagination over match_user's ranking.
+        The first call (no cursor) ranks the corpus (or live_jobs) once and keeps the ranked
+        rows as a short-lived snapshot keyed by profile fingerprint plus index version (or
+        the live job ids); every page, including later ones, only builds payloads for its
+        own rows. Pages of one snapshot are stable even if the index changes meanwhile.
+        source: caller's label for where the jobs came from, kept with the snapshot.
+        Returns: (results, next_cursor, source), next_cursor None on the last page and
+        source the label given on the first call.
+        Raises CursorError for malformed or expired cursors, or cursors of another profile.
+        """
+        limit = max(1, int(limit))
+        fingerprint = self.profile_fingerprint(profile)
+        user_skill_map = self.build_user_skill_map(profile['skills'])
+        if cursor:
+            key, offset = _decode_cursor(cursor)
+            snapshot = self.ranked_snapshots.get(key)
+            if snapshot is None or snapshot['fingerprint'] != fingerprint:
+                raise CursorError("Cursor expired or not valid for this profile")
+        else:
+            offset = 0
+            snapshot, key = self._ranked_snapshot(profile, fingerprint, user_skill_map, live_jobs, min_score, source)
+            if snapshot is None:
+                return [], None, source
+        
+        rows = snapshot['rows'][offset:offset + limit]
+        index = snapshot['index']
+        with self._index_lock:
+            results = self._page_results(index, user_skill_map, self._score_rows(index, profile, user_skill_map, rows))
+        end = offset + len(rows)
+        next_cursor = _encode_cursor(key, end) if end < len(snapshot['rows']) else None
+        return results, next_cursor, snapshot['source']
 
-                results.append({
-                    'job_id': str(job.get('job_id') or job.get('_id') or 'unknown'),
-                    'title': str(job.get('title', 'Unknown Role')),
-                    'company': str(job.get('company_name') or job.get('company') or 'Company'),
-                    'location': str(job.get('location', 'Remote')),
-                    'readiness_score': float(round(readiness_score * 100, 1)), # Used for display
-                    'match_score': float(round(readiness_score * 100, 1)), # Logic compatibility
-                    'weighted_skill_score': weighted_skill_score,
-                    'missing_skills': missing_skills[:5],
-                    'required_skills': job.get('mapped_skills', []),
-                    'experience_level': str(job.get('formatted_experience_level', 'Entry')),
-                    'salary': str(job.get('salary_disp', 'Competitive')),
-                    'category': job_category,
-                    'best_action': best_action,
-                    'readiness_breakdown': readiness_explanation,
-                    'source': job.get('source', 'csv')
-                })
-            except Exception as e:
-                print(f"Skipping job {job.get('title', 'unknown')} due to scoring error: {e}")
-                continue
+    def _ranked_snapshot(self, profile, fingerprint, user_skill_map, live_jobs, min_score, source):
+        """(snapshot, key) for match_page, reusing a live snapshot of the same ranking."""
+        if live_jobs:
+            jobs = [str(job.get('job_id') or job.get('_id') or '') + '|' + str(job.get('title', '')) for job in live_jobs]
+        else:
+            jobs = self.index_version
+        key = hashlib.sha1(json.dumps([fingerprint, jobs, min_score, source]).encode()).hexdigest()[:24]
+        snapshot = self.ranked_snapshots.get(key)
+        if snapshot is not None:
+            return snapshot, key
+        
+        if live_jobs:
+            index = self._new_index().extend_records(live_jobs)
+        else:
+            index = self.job_index
+            if index is None:
+                return None, key
+        with self._index_lock:
+            pool = self._score_pool(index, profile, user_skill_map, None, min_score)
+        order = self._rank(self._display_scores(pool[-1]))
+        snapshot = {'fingerprint': fingerprint, 'index': index, 'rows': pool[0][order], 'source': source}
+        self.ranked_snapshots.put(key, snapshot)
+        return snapshot, key
+
+    def match_many(self, profiles, jobs=None, top_k=None):
+        """
+        Batch version of match_user: one result list per profile, identical to
+        match_user(profile, live_jobs=jobs, top_k=top_k).
+        Profiles are stacked into sparse users x skills (and users x terms) matrices and
+        scored against the whole index with one sparse product per chunk of profiles.
+        """
+        if not profiles:
+            return []
+        if jobs:
+            index = self._new_index().extend_records(jobs)
+            return self._match_many_index(index, profiles, top_k)
+        
+        with self._index_lock:
+            if self.job_index is None:
+                return [[] for _ in profiles]
+            return self._match_many_index(self.job_index, profiles, top_k)
+
+    def _match_many_index(self, index, profiles, top_k=None, ranked_rows=False):
+        """
+        ranked_rows: return (rows, display scores) of the top_k ranks per profile
+        instead of payloads.
+        """
+        if len(index) == index.tombstones:
+            empty = (np.empty(0, dtype=np.int64), np.empty(0))
+            return [empty if ranked_rows else [] for _ in profiles]
+        
+        skill_maps = [self.build_user_skill_map(profile['skills']) for profile in profiles]
+        roles = [self._target_role(profile) for profile in profiles]
+        use_text = self.tfidf is not None and index.text_matrix.shape[1] > 0
+        
+        # 1. Transposed index matrices: skill -> (jobs, weights), term -> (jobs, tf-idf)
+        skills_by_job = index.skill_matrix.T.tocsr()
+        terms_by_job = index.text_matrix.T.tocsr() if use_text else None
+        role_queries = {}
+        if use_text:
+            for role in set(roles):
+                if role:
+                    role_queries[role] = self._role_query(role)
+        
+        # 2. Chunk profiles by an upper bound on their non-zeros in the products
+        posting_sizes = np.diff(skills_by_job.indptr)
+        term_sizes = np.diff(terms_by_job.indptr) if use_text else None
+        estimates = []
+        for skill_map, role in zip(skill_maps, roles):
+            ids = [index.skill_vocab[s] for s in skill_map if s in index.skill_vocab]
+            estimate = int(posting_sizes[ids].sum())
+            if role in role_queries:
+                estimate += int(term_sizes[role_queries[role].indices].sum())
+            estimates.append(estimate)
+        
+        results = []
+        start = 0
+        while start < len(profiles):
+            end, budget = start + 1, estimates[start]
+            while end < len(profiles) and budget + estimates[end] <= self.BATCH_MAX_NONZEROS:
+                budget += estimates[end]
+                end += 1
+            results.extend(self._match_chunk(index, profiles[start:end], skill_maps[start:end], roles[start:end],
+                                             skills_by_job, terms_by_job, role_queries, top_k, ranked_rows))
+            start = end
+        return results
+
+    def _match_chunk(self, index, profiles, skill_maps, roles, skills_by_job, terms_by_job, role_queries, top_k,
+                     ranked_rows=False):
+        """Scores a chunk of profiles with one sparse product per score component."""
+        # 1. Users x skills indicator and confidence matrices
+        rows, cols, confidences = [], [], []
+        for i, skill_map in enumerate(skill_maps):
+            for skill, conf in skill_map.items():
+                idx = index.skill_vocab.get(skill)
+                if idx is not None:
+                    rows.append(i)
+                    cols.append(idx)
+                    confidences.append(conf)
+        shape = (len(profiles), len(index.skill_names))
+        has_skill = sparse.csr_matrix((np.ones(len(rows)), (rows, cols)), shape=shape)
+        confidence = sparse.csr_matrix((np.asarray(confidences, dtype=np.float64), (rows, cols)), shape=shape)
+        has_skill.sort_indices()
+        confidence.sort_indices()
+        
+        # 2. Users x jobs products (only overlapping jobs are stored)
+        matched = (has_skill @ skills_by_job).tocsr()
+        confidence_weighted = (confidence @ skills_by_job).tocsr()
+        role_similarity = None
+        if terms_by_job is not None:
+            empty = sparse.csr_matrix((1, terms_by_job.shape[0]))
+            queries = sparse.vstack([role_queries.get(role, empty) for role in roles]).tocsr()
+            role_similarity = (queries @ terms_by_job).tocsr()
+        
+        # 3. Per profile: candidate rows and their sums, then the usual pool/rank/materialize
+        results = []
+        for i, profile in enumerate(profiles):
+            skill_rows, skill_sums = _csr_row(matched, i)
+            conf_rows, conf_sums = _csr_row(confidence_weighted, i)
+            if roles[i] and role_similarity is not None:
+                role_rows, role_sums = _csr_row(role_similarity, i)
+                role_rows, role_sums = role_rows[role_sums != 0], role_sums[role_sums != 0]
+            else:
+                role_rows = role_sums = np.empty(0)
             
-        # Sort by readiness score
-        results.sort(key=lambda x: x['readiness_score'], reverse=True)
+            candidates = np.union1d(skill_rows, role_rows).astype(np.int64)
+            matched_weight = np.zeros(len(candidates))
+            matched_weight[np.searchsorted(candidates, skill_rows)] = skill_sums
+            conf_weight = np.zeros(len(candidates))
+            conf_weight[np.searchsorted(candidates, conf_rows)] = conf_sums
+            role = None
+            if roles[i]:
+                role = np.zeros(len(candidates))
+                role[np.searchsorted(candidates, role_rows)] = self._role_from_similarity(role_sums)
+            
+            keep = index.active[candidates]
+            pool = self._pool(index, profile, candidates[keep], matched_weight[keep], conf_weight[keep],
+                              role[keep] if role is not None else None, top_k)
+            if ranked_rows:
+                display = self._display_scores(pool[-1])
+                selected = self._rank(display, top_k)
+                results.append((pool[0][selected], display[selected]))
+            else:
+                results.append(self._page_results(index, skill_maps[i], pool, top_k))
         return results
+
+    def _display_scores_for_rows(self, index, profile, user_skill_map, rows):
+        """Displayed readiness of one profile for specific rows only (no corpus-wide pass)."""
+        return self._display_scores(self._score_rows(index, profile, user_skill_map, rows)[-1])
+
+    def _score_rows(self, index, profile, user_skill_map, rows):
+        """
+        Full scores of one profile for specific rows, in the given order (same values as
+        _score_pool). Returns: (rows, base, weighted, exp, role, readiness)
+        """
+        matched, confidence_weighted = self._skill_sums(index, user_skill_map, rows)
+        base, weighted = self._skill_scores(index.total_weight[rows], matched, confidence_weighted)
+        exp = self._experience_scores_by_code(profile)[index.experience_codes[rows]]
+        role = self._role_scores_for_rows(index, self._target_role(profile), rows)
+        return rows, base, weighted, exp, role, self.ml_matcher.predict_batch(weighted, exp, role)
+
+    def match_new_jobs(self, candidate_index, job_ids, min_score=60, top_k=5):
+        """
+        Reverse matching for newly posted jobs: finds the candidates whose top_k matches
+        now include one of job_ids with readiness_score >= min_score.
+        Only candidates sharing a skill with a new job are scored, unless min_score is low
+        enough to be reached without any skill (experience and role weights alone). Each
+        candidate's cached top_k (rows, scores) is brought up to date by scoring just the
+        rows appended since it was computed; it is recomputed when the index was rebuilt or
+        one of its rows was removed, keeping only jobs at or above min_score
+        (_threshold_pool), or in one match_many pass if that cannot prune.
+        Jobs below min_score never decide whether a new job >= min_score enters the top_k.
+        Returns: list of (user_id, match) with match = {job_id, title, company, readiness_score}.
+        """
+        with self._index_lock:
+            index = self.job_index
+            if index is None:
+                return []
+            new_rows = {}
+            for job_id in job_ids:
+                row = index.row_of.get(str(job_id))
+                if row is not None:
+                    new_rows[row] = str(job_id)
+            if not new_rows:
+                return []
+            
+            # 1. Candidates sharing at least one skill with a new job
+            no_skill_max = (self.ml_matcher.EXPERIENCE_WEIGHT + self.ml_matcher.ROLE_WEIGHT) * 100
+            if min_score - 0.05 <= no_skill_max:
+                user_ids = candidate_index.user_ids()
+            else:
+                user_ids = set()
+                for row in new_rows:
+                    for k in index.skill_ids(row):
+                        user_ids |= candidate_index.users_with_skill(index.skill_names[k])
+            profiles = candidate_index.profiles(sorted(user_ids))
+            
+            # 2. Recompute stale top_k caches in one batch
+            tops = {u: candidate_index.cached_top(u, index, min_score) for u in profiles}
+            stale = [u for u in profiles if tops[u] is None]
+            for user_id in list(stale):
+                profile, skill_map = profiles[user_id]
+                pool = self._threshold_pool(index, profile, skill_map, min_score)
+                if pool is None:
+                    break
+                scores = self._display_scores(pool[-1])
+                keep = np.flatnonzero(scores >= min_score)
+                order = keep[self._rank(scores[keep], top_k)]
+                tops[user_id] = (pool[0][order], scores[order], len(index))
+                stale.remove(user_id)
+            if stale:
+                ranked = self._match_many_index(index, [profiles[u][0] for u in stale], top_k, ranked_rows=True)
+                for user_id, (rows, scores) in zip(stale, ranked):
+                    tops[user_id] = (rows, scores, len(index))
+            
+            # 3. Fold rows appended since each cache was computed, then check the new jobs
+            matches = []
+            for user_id, (profile, skill_map) in profiles.items():
+                rows, scores, upto = tops[user_id]
+                if upto < len(index):
+                    appended = np.arange(upto, len(index))
+                    appended = appended[index.active[appended]]
+                    appended_scores = self._display_scores_for_rows(index, profile, skill_map, appended)
+                    rows = np.concatenate([rows, appended])
+                    scores = np.concatenate([scores, appended_scores])
+                    # Descending score, ties in corpus order (as in _rank)
+                    order = np.lexsort((rows, -scores))[:top_k]
+                    rows, scores = rows[order], scores[order]
+                candidate_index.set_top(user_id, profile, index, len(index), rows, scores, min_score)
+                
+                for row, score in zip(rows.tolist(), scores.tolist()):
+                    if row in new_rows and score >= min_score:
+                        record = index.record(row)
+                        matches.append((user_id, {
+                            'job_id': new_rows[row],
+                            'title': str(record.get('title', 'Unknown Role')),
+                            'company': str(record.get('company_name') or record.get('company') or 'Company'),
+                            'readiness_score': float(score)
+                        }))
+            return matches
+
     
+    def _row_components(self, index, profile, user_skill_map, row):
+        """
+        Skill weight sums, experience and role score of one row, computed from the row's own
+        skills only (same summation order as _skill_sums).
+        Returns: (matched_weight, confidence_weighted, exp_score, role_score)
+        """
+        weights = index.vocab_weights
+        matched = confidence_weighted = 0.0
+        for k in index.skill_ids(row).tolist():
+            conf = user_skill_map.get(index.skill_names[k])
+            if conf is not None:
+                matched += weights[k]
+                confidence_weighted += weights[k] * conf
+        exp = self._experience_scores_by_code(profile)[index.experience_codes[row]]
+        role = float(self._role_scores_for_rows(index, self._target_role(profile), np.array([row]))[0])
+        return matched, confidence_weighted, exp, role
+
+    def match_job(self, profile, job_id):
+        """
+        Match payload of one active indexed job, i.e. the entry match_user(profile) would
+        return for job_id, scored on that row alone. None if the job is not indexed.
+        """
+        user_skill_map = self.build_user_skill_map(profile.get('skills') or [])
+        with self._index_lock:
+            index = self.job_index
+            row = index.row_of.get(str(job_id)) if index is not None else None
+            if row is None or not index.active[row]:
+                return None
+            rows = np.array([row], dtype=np.int64)
+            return self._page_results(index, user_skill_map, self._score_rows(index, profile, user_skill_map, rows))[0]
+
+    def what_if(self, profile, add_skill, job_id):
+        """
+        Match payload of one indexed job after adding a skill to the profile, i.e. the entry
+        match_user(profile + add_skill) would return for job_id, computed from that job's
+        precompiled skill weights instead of a corpus rescore. None if the job is not indexed.
+        """
+        sim_profile = dict(profile)
+        sim_profile['skills'] = list(profile.get('skills') or []) + [add_skill]
+        user_skill_map = self.build_user_skill_map(sim_profile['skills'])
+        with self._index_lock:
+            index = self.job_index
+            row = index.row_of.get(str(job_id)) if index is not None else None
+            if row is None:
+                return None
+            matched, confidence_weighted, exp, role = self._row_components(index, sim_profile, user_skill_map, row)
+            base, weighted = self._skill_scores(index.total_weight[[row]], np.array([matched]),
+                                                np.array([confidence_weighted]))
+            readiness = self.ml_matcher.predict_batch(weighted, [exp], [role])
+            missing_skills = [index.skill_names[k] for k in index.skill_ids(row) if index.skill_names[k] not in user_skill_map]
+            return self._build_result(index.record(row), float(base[0]), float(weighted[0]), float(exp), float(role),
+                                      float(readiness[0]), missing_skills)
+
+    def rank_skill_gains(self, profile, top_n=10, confidence=0.6):
+        """
+        Ranks every skill the user is missing from their top_n jobs by the total readiness
+        gain learning it would bring across those jobs (one vectorized pass: adding skill s
+        to job j only changes j's skill weight sums by j's weight for s).
+        confidence: confidence assumed for a newly learned skill (0.6 = plain skill name).
+        Returns: list of {skill, readiness_gain, average_gain, jobs_affected, jobs_reaching_apply_now},
+        highest total gain first (gains in readiness percentage points).
+        """
+        user_skill_map = self.build_user_skill_map(profile.get('skills') or [])
+        with self._index_lock:
+            index = self.job_index
+            if index is None or len(index) == index.tombstones:
+                return []
+            pool_rows, _, weighted, exp, role, readiness = self._score_pool(index, profile, user_skill_map, top_n)
+            selected = self._rank(self._display_scores(readiness), top_n)
+            rows = pool_rows[selected]
+            exp, role, readiness = exp[selected], role[selected], readiness[selected]
+            
+            # 1. Candidate skills: required by a top job, not held by the user
+            matrix = index.skill_matrix[rows]
+            skill_ids = np.unique(matrix.indices)
+            skill_ids = np.array([k for k in skill_ids.tolist() if index.skill_names[k] not in user_skill_map], dtype=np.int64)
+            if len(skill_ids) == 0:
+                return []
+            
+            # 2. Current sums per job, and each candidate skill's weight in each job (jobs x skills)
+            matched, confidence_weighted = self._skill_sums(index, user_skill_map, rows)
+            added = matrix[:, skill_ids].toarray()
+            total = index.total_weight[rows][:, None]
+            new_matched = matched[:, None] + added
+            new_confidence = confidence_weighted[:, None] + added * confidence
+            _, new_weighted = self._skill_scores(total, new_matched, new_confidence)
+            new_readiness = self.ml_matcher.predict_batch(new_weighted, exp[:, None], role[:, None])
+            gain = (new_readiness - readiness[:, None]) * 100
+            
+            # 3. Aggregate per skill
+            total_gain = gain.sum(axis=0)
+            affected = (added > 0).sum(axis=0)
+            reaching_apply_now = ((new_readiness >= 0.70) & (readiness[:, None] < 0.70)).sum(axis=0)
+            order = np.lexsort((np.array([index.skill_names[k] for k in skill_ids.tolist()]), -total_gain))
+            ranking = []
+            for i in order.tolist():
+                ranking.append({
+                    'skill': index.skill_names[skill_ids[i]],
+                    'readiness_gain': round(float(total_gain[i]), 1),
+                    'average_gain': round(float(total_gain[i]) / len(rows), 1),
+                    'jobs_affected': int(affected[i]),
+                    'jobs_reaching_apply_now': int(reaching_apply_now[i])
+                })
+        return ranking
+
     def classify_job(self, readiness_score):
         """
         Classify job into actionable categories based on readiness.
@@ -387,9 +1454,14 @@ class CareerMatcher:
                 'skill': None
             }
         
-        # For now, recommend the first missing skill
-        # In production, this would analyze skill frequency across all jobs
-        primary_skill = missing_skills[0]
+        # Recommend the missing skill most frequently required across all jobs
+        # (ties keep the job's order)
+        index = self.job_index
+        if index is not None:
+            counts = index.demand.counts
+            primary_skill = max(missing_skills, key=lambda s: counts.get(normalize_skill(s), 0))
+        else:
+            primary_skill = missing_skills[0]
         
         return {
             'type': 'learn_skill',
@@ -402,18 +1474,24 @@ class CareerMatcher:
         """
         Provide transparent breakdown of readiness score.
         """
+        model = self.ml_matcher
         return {
             'overall': round(readiness_score * 100, 1),
             'components': {
                 'skills': {
                     'score': round(skill_score * 100, 1),
-                    'weight': '70%',
-                    'contribution': round(skill_score * 0.7 * 100, 1)
+                    'weight': f"{model.SKILL_WEIGHT:.0%}",
+                    'contribution': round(skill_score * model.SKILL_WEIGHT * 100, 1)
                 },
                 'experience': {
                     'score': round(exp_score * 100, 1),
-                    'weight': '30%',
-                    'contribution': round(exp_score * 0.3 * 100, 1)
+                    'weight': f"{model.EXPERIENCE_WEIGHT:.0%}",
+                    'contribution': round(exp_score * model.EXPERIENCE_WEIGHT * 100, 1)
+                },
+                'role': {
+                    'score': round(role_score * 100, 1),
+                    'weight': f"{model.ROLE_WEIGHT:.0%}",
+                    'contribution': round(role_score * model.ROLE_WEIGHT * 100, 1)
                 }
             },
             'explanation': self.generate_readiness_explanation(skill_score, exp_score, readiness_score)
@@ -437,6 +1515,32 @@ class CareerMatcher:
                 return "Your skills are developing, but this role is too senior for your current experience level."
 
 
+def _csr_row(matrix, i):
+    """(column indices, values) of one CSR row, ordered by column."""
+    start, end = matrix.indptr[i], matrix.indptr[i + 1]
+    order = np.argsort(matrix.indices[start:end], kind='stable')
+    return matrix.indices[start:end][order], matrix.data[start:end][order]
+
+
+def _encode_cursor(key, offset):
+    return base64.urlsafe_b64encode(f"{key}:{offset}".encode()).decode().rstrip('=')
+
+def _decode_cursor(cursor):
+    """cursor -> (snapshot key, offset). Raises CursorError."""
+    try:
+        key, offset = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode().split(':')
+        offset = int(offset)
+    except (ValueError, UnicodeDecodeError):
+        raise CursorError("Malformed cursor")
+    if offset < 0:
+        raise CursorError("Malformed cursor")
+    return key, offset
+
+def _take(pool, positions):
+    """Sub-pool at the given positions, in that (already ranked) order."""
+    return tuple(column[positions] for column in pool)
+
+
 if __name__ == "__main__":
     # Test
     from data_engine import DataEngine
@@ -1,5 +1,8 @@
-import random
+import os
+import pickle
+import threading
 import numpy as np
+import sklearn
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.preprocessing import StandardScaler
 import pandas as pd
@@ -18,69 +21,159 @@ class MockDataGenerator:
         ]
         self.levels = ['Entry', 'Mid-Senior', 'Director']
 
-    def generate_training_data(self, n_samples=2000):
-        data = []
-        labels = []
+    def generate_training_data(self, n_samples=2000, seed=None):
+        """Synthetic (features, hired labels), vectorized. Features: [skill, exp, role] match."""
+        rng = np.random.default_rng(seed)
         
-        for _ in range(n_samples):
-            # 1. Generate Random Pair
-            skill_match = random.random() # 0.0 to 1.0
-            exp_match = random.choice([0.2, 0.5, 0.8, 1.0])
-            role_match = random.choice([0.0, 0.7, 1.0])
-            
-            # 2. Determine Outcome Logic (The "Ground Truth")
-            # We want the model to learn that High Skill + High Role match = Hired
-            
-            score = (skill_match * 0.6) + (exp_match * 0.3) + (role_match * 0.1)
-            
-            # Add some noise/randomness to make it realistic
-            noise = random.uniform(-0.1, 0.1)
-            final_score = score + noise
-            
-            is_hired = 1 if final_score > 0.75 else 0
-            
-            # Feature Vector
-            features = [skill_match, exp_match, role_match]
-            data.append(features)
-            labels.append(is_hired)
-            
-        return np.array(data), np.array(labels)
+        # 1. Generate Random Pairs
+        skill_match = rng.random(n_samples) # 0.0 to 1.0
+        exp_match = rng.choice([0.2, 0.5, 0.8, 1.0], n_samples)
+        role_match = rng.choice([0.0, 0.7, 1.0], n_samples)
+        
+        # 2. Determine Outcome Logic (The "Ground Truth")
+        # We want the model to learn that High Skill + High Role match = Hired
+        score = (skill_match * 0.6) + (exp_match * 0.3) + (role_match * 0.1)
+        
+        # Add some noise/randomness to make it realistic
+        final_score = score + rng.uniform(-0.1, 0.1, n_samples)
+        
+        labels = (final_score > 0.75).astype(np.int64)
+        return np.column_stack([skill_match, exp_match, role_match]), labels
 
 class MLMatcher:
     """
     Machine Learning based matcher using Random Forest.
+    Readiness itself is the weighted linear formula (predict_match_probability / predict_batch);
+    the forest is only trained when first accessed (model / scaler / ensure_trained), from the
+    persisted model file when one matches MODEL_VERSION, otherwise on synthetic data.
     """
-    def __init__(self):
-        self.model = RandomForestClassifier(n_estimators=100, max_depth=5, random_state=42)
-        self.scaler = StandardScaler()
-        self.is_trained = False
-        
+    # Bump when the training data or model parameters change (invalidates model files)
+    MODEL_VERSION = 1
+    TRAINING_SAMPLES = 2000
+    TRAINING_SEED = 42
+    # Readiness weights (skills, experience, role); bounds in CareerMatcher derive from these
+    SKILL_WEIGHT = 0.7
+    EXPERIENCE_WEIGHT = 0.2
+    ROLE_WEIGHT = 0.1
+
+    def __init__(self, model_path=None):
+        self.model_path = model_path
+        self._model = None
+        self._scaler = None
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        state.setdefault('model_path', None)
+        if 'model' in state:
+            # Pickled before lazy training
+            state['_model'] = state.pop('model') if state.pop('is_trained', False) else None
+            state['_scaler'] = state.pop('scaler')
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @property
+    def is_trained(self):
+        return self._model is not None
+
+    @property
+    def model(self):
+        self.ensure_trained()
+        return self._model
+
+    @property
+    def scaler(self):
+        self.ensure_trained()
+        return self._scaler
+
+    def ensure_trained(self):
+        """Loads the persisted model or trains it, once."""
+        if self._model is not None:
+            return
+        with self._lock:
+            if self._model is None and not self.load():
+                self.train()
+
     def train(self):
         """
-        Trains the model on synthetic data.
+        Trains the model on synthetic data and persists it to model_path (if set).
         """
         print("🧠 Training ML Model on synthetic data...")
         generator = MockDataGenerator()
-        X_train, y_train = generator.generate_training_data()
+        X_train, y_train = generator.generate_training_data(self.TRAINING_SAMPLES, seed=self.TRAINING_SEED)
         
         # Scale features
-        X_train_scaled = self.scaler.fit_transform(X_train)
+        scaler = StandardScaler()
+        X_train_scaled = scaler.fit_transform(X_train)
         
         # Fit model
-        self.model.fit(X_train_scaled, y_train)
-        self.is_trained = True
+        model = RandomForestClassifier(n_estimators=100, max_depth=5, random_state=42)
+        model.fit(X_train_scaled, y_train)
+        self._model, self._scaler = model, scaler
         
-        accuracy = self.model.score(X_train_scaled, y_train)
+        accuracy = model.score(X_train_scaled, y_train)
         print(f"✅ Model Trained. Validation Accuracy: {accuracy:.2f}")
+        self.save()
+
+    def save(self):
+        """Writes the trained model to model_path (atomically). Returns True on success."""
+        if not self.model_path or self._model is None:
+            return False
+        tmp_path = f"{self.model_path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.model_path) or '.', exist_ok=True)
+            with open(tmp_path, 'wb') as f:
+                pickle.dump({'version': self.MODEL_VERSION, 'sklearn': sklearn.__version__,
+                             'model': self._model, 'scaler': self._scaler}, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self.model_path)
+            return True
+        except Exception as e:
+            print(f"Could not save ML model: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return False
+
+    def load(self):
+        """Loads a model file written by save() for this MODEL_VERSION and scikit-learn version."""
+        if not self.model_path or not os.path.exists(self.model_path):
+            return False
+        try:
+            with open(self.model_path, 'rb') as f:
+                stored = pickle.load(f)
+            if stored.get('version') != self.MODEL_VERSION or stored.get('sklearn') != sklearn.__version__:
+                return False
+            self._model, self._scaler = stored['model'], stored['scaler']
+            print("✅ Loaded ML model.")
+            return True
+        except Exception as e:
+            print(f"Could not load ML model: {e}")
+            return False
         
     def predict_match_probability(self, skill_score, exp_score, role_score):
         """
         Predicts match probability using a weighted linear combination for maximum sensitivity.
         Weights: Skills (70%), Experience (20%), Role (10%)
         """
-        score = (clean_val_ml(skill_score) * 0.7) + (clean_val_ml(exp_score) * 0.2) + (clean_val_ml(role_score) * 0.1)
+        score = (clean_val_ml(skill_score) * self.SKILL_WEIGHT) + (clean_val_ml(exp_score) * self.EXPERIENCE_WEIGHT) + \
+                (clean_val_ml(role_score) * self.ROLE_WEIGHT)
         return float(max(0.0, min(1.0, score)))
 
+    def predict_batch(self, skill_scores, exp_scores, role_scores):
+        """
+        predict_match_probability over NumPy arrays (one value per job) in one call.
+        NaNs count as 0; arrays broadcast against each other.
+        """
+        skill = np.nan_to_num(np.asarray(skill_scores, dtype=np.float64))
+        exp = np.nan_to_num(np.asarray(exp_scores, dtype=np.float64))
+        role = np.nan_to_num(np.asarray(role_scores, dtype=np.float64))
+        score = (np.clip(skill, 0.0, 1.0) * self.SKILL_WEIGHT) + (np.clip(exp, 0.0, 1.0) * self.EXPERIENCE_WEIGHT) + \
+                (np.clip(role, 0.0, 1.0) * self.ROLE_WEIGHT)
+        return np.clip(score, 0.0, 1.0)
+
 def clean_val_ml(v):
     if v is None: return 0.0
     try:
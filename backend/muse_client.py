@@ -0,0 +1,99 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+
+MUSE_API_URL = os.getenv('MUSE_API_URL', 'https://www.themuse.com/api/public')
+
+
+class MuseClient:
+    """
+    Pooled, concurrent client for The Muse public jobs API.
+
+    One requests.Session with a keep-alive HTTPAdapter is shared by all calls, so repeated
+    searches reuse connections. fetch_many() fetches pages of several categories on a
+    bounded thread pool; requests to the same host are additionally capped by a per-host
+    semaphore (max_per_host), which also sizes the connection pool.
+    base_url can point at a local stub server.
+    """
+    def __init__(self, base_url=None, max_workers=8, max_per_host=4, timeout=5):
+        self.base_url = (base_url or MUSE_API_URL).rstrip('/')
+        self.max_workers = max_workers
+        self.max_per_host = max_per_host
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max_per_host)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def _host_slot(self, url):
+        host = urlsplit(url).netloc
+        with self._lock:
+            slot = self._hosts.get(host)
+            if slot is None:
+                slot = self._hosts[host] = threading.BoundedSemaphore(self.max_per_host)
+        return slot
+
+    def fetch_page(self, category, page=1, location=None):
+        """
+        One page of jobs: (results, page_count).
+        Raises requests.RequestException on network errors and non-200 responses.
+        """
+        url = f"{self.base_url}/jobs"
+        params = {'category': category, 'page': page}
+        if location:
+            params['location'] = location
+        with self._host_slot(url):
+            response = self.session.get(url, params=params, timeout=self.timeout)
+        if response.status_code != 200:
+            raise requests.HTTPError(f"The Muse API returned {response.status_code}", response=response)
+        data = response.json()
+        return data.get('results', []), data.get('page_count', 1)
+
+    def fetch_many(self, categories, pages=1, location=None):
+        """
+        Up to `pages` pages of every category, fetched concurrently.
+        Page 1 of each category comes first (it carries page_count), the remaining pages
+        follow in one parallel wave. Failed pages are logged and skipped.
+        Returns raw items in category / page order, de-duplicated by id.
+        """
+        with ThreadPoolExecutor(min(self.max_workers, max(len(categories), 1) * pages)) as pool:
+            # 1. First pages
+            first = [pool.submit(self.fetch_page, category, 1, location) for category in categories]
+            pages_by_category = {}
+            follow_ups = []
+            for category, future in zip(categories, first):
+                try:
+                    results, page_count = future.result()
+                except Exception as e:
+                    print(f"The Muse fetch failed ({category}, page 1): {e}")
+                    continue
+                pages_by_category[category] = [results]
+                # 2. Remaining pages, bounded by what the API reports
+                for page in range(2, min(pages, page_count) + 1):
+                    follow_ups.append((category, page, pool.submit(self.fetch_page, category, page, location)))
+
+            for category, page, future in follow_ups:
+                try:
+                    pages_by_category[category].append(future.result()[0])
+                except Exception as e:
+                    print(f"The Muse fetch failed ({category}, page {page}): {e}")
+
+        items, seen = [], set()
+        for category in categories:
+            for results in pages_by_category.get(category, []):
+                for item in results:
+                    key = item.get('id')
+                    if key is not None:
+                        if key in seen:
+                            continue
+                        seen.add(key)
+                    items.append(item)
+        return items
+
+    def close(self):
+        self.session.close()
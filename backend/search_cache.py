@@ -0,0 +1,68 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Seconds a search result is served as fresh, then how long it may still be served stale
+SEARCH_CACHE_TTL = int(os.getenv('SEARCH_CACHE_TTL', '300'))
+SEARCH_CACHE_MAX_STALE = int(os.getenv('SEARCH_CACHE_MAX_STALE', '3600'))
+
+
+class SearchCache:
+    """
+    Stale-while-revalidate cache in front of a live job search.
+
+    Entries are keyed on (category, location, page) and kept in a flask_caching backend.
+    Fresh entries (younger than ttl) are returned as is; stale entries (up to ttl +
+    max_stale) are returned while a background refresh runs. A miss returns None and
+    schedules the fetch, so callers fall back to the local corpus instead of waiting on
+    the remote API. At most one refresh per key is in flight; failed refreshes keep the
+    previous entry.
+    """
+    def __init__(self, cache, fetch, ttl=SEARCH_CACHE_TTL, max_stale=SEARCH_CACHE_MAX_STALE, workers=2):
+        self.cache = cache
+        self.fetch = fetch          # (category, location, page) -> list of jobs, raises on failure
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self._pool = ThreadPoolExecutor(workers, thread_name_prefix='search_refresh')
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self.stats = {'fresh': 0, 'stale': 0, 'miss': 0, 'refresh_errors': 0}
+
+    @staticmethod
+    def key(category, location=None, page=1):
+        return f"muse_search:{category.lower()}|{(location or '').strip().lower()}|{page}"
+
+    def get(self, category, location=None, page=1):
+        """Cached jobs for a search (fresh or stale), or None on a miss."""
+        key = self.key(category, location, page)
+        entry = self.cache.get(key)
+        if entry is not None and time.time() - entry['fetched_at'] < self.ttl:
+            self.stats['fresh'] += 1
+            return entry['jobs']
+        self.refresh(category, location, page)
+        if entry is not None:
+            self.stats['stale'] += 1
+            return entry['jobs']
+        self.stats['miss'] += 1
+        return None
+
+    def refresh(self, category, location=None, page=1):
+        """Schedules a background fetch of one search (no-op while one is running)."""
+        key = self.key(category, location, page)
+        with self._lock:
+            if key in self._refreshing:
+                return None
+            self._refreshing.add(key)
+        return self._pool.submit(self._refresh, key, category, location, page)
+
+    def _refresh(self, key, category, location, page):
+        try:
+            jobs = self.fetch(category, location, page)
+            self.cache.set(key, {'jobs': jobs, 'fetched_at': time.time()}, timeout=self.ttl + self.max_stale)
+        except Exception as e:
+            self.stats['refresh_errors'] += 1
+            print(f"Search refresh failed for {key}: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
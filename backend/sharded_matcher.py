@@ -0,0 +1,200 @@
+import atexit
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from scipy import sparse
+from disk_store import load_array
+
+# Arrays published per index (one .npy file each)
+SHARED_ARRAYS = ('skill_indptr', 'skill_indices', 'skill_data', 'total_weight', 'experience_codes',
+                 'text_indptr', 'text_indices', 'text_data', 'active')
+
+# Worker side: arrays of the generation last attached to, by directory, and the readiness model
+_attached = {}
+_models = []
+
+
+class ShardedScorer:
+    """
+    Multi-core scoring of a large JobIndex.
+    The index arrays are published once per index as .npy files in shared memory (/dev/shm
+    when available) and memory-mapped by a persistent pool of worker processes, so shards
+    are never pickled. Each worker scores a contiguous row range in full and returns the
+    top-K of its shard; the caller merges the per-shard heads.
+
+    Rows appended after publishing are scored in the calling process and deactivations are
+    copied to the shared 'active' array before scoring. A new index (train, compaction,
+    snapshot load) is published again on first use. The workers are forked by start(),
+    which the app calls at startup before other threads exist.
+    """
+    def __init__(self, workers):
+        self.workers = workers
+        self._pool = None
+        self._index = None
+        self._dir = None
+        self._rows = 0
+        self._skills = 0
+        self._tombstones = 0
+        self._active = None
+        self._lock = threading.Lock()
+        atexit.register(self.close)
+
+    def start(self):
+        """
+        Forks the worker processes (once) and returns self. Call it while the process has
+        no other threads yet: a fork copies locks held by other threads, which can deadlock
+        the workers. score() never creates processes.
+        """
+        if self._pool is None:
+            # fork where available: spawn would re-run the app module (startup, training) in every worker.
+            # Workers only touch numpy/scipy and the memory-mapped arrays.
+            method = 'fork' if 'fork' in multiprocessing.get_all_start_methods() else 'spawn'
+            self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context(method))
+            # Forked pools start all workers with the first task
+            self._pool.submit(os.getpid).result()
+        return self
+
+    def publish(self, index):
+        """Writes the scoring arrays of an index to a fresh shared directory."""
+        root = '/dev/shm' if os.path.isdir('/dev/shm') else None
+        path = tempfile.mkdtemp(prefix='matcher_shards_', dir=root)
+        skills, text = index.skill_matrix, index.text_matrix
+        arrays = {
+            'skill_indptr': skills.indptr, 'skill_indices': skills.indices, 'skill_data': skills.data,
+            'total_weight': index.total_weight, 'experience_codes': index.experience_codes,
+            'text_indptr': text.indptr, 'text_indices': text.indices, 'text_data': text.data,
+        }
+        for name, array in arrays.items():
+            np.save(os.path.join(path, name + '.npy'), np.ascontiguousarray(array))
+        active = np.lib.format.open_memmap(os.path.join(path, 'active.npy'), mode='w+',
+                                           dtype=np.bool_, shape=(len(index),))
+        active[:] = index.active
+        active.flush()
+
+        previous = self._dir
+        self._index, self._dir, self._active = index, path, active
+        self._rows, self._skills, self._tombstones = len(index), skills.shape[1], index.tombstones
+        if previous:
+            shutil.rmtree(previous, ignore_errors=True)
+        print(f"Published {len(index)} jobs for sharded matching ({self.workers} workers)")
+
+    def score(self, index, has_skill, confidence, exp_by_code, role_query, default_role, k):
+        """
+        Top-k (by displayed score, ties by row) of an index for one profile.
+        has_skill / confidence: dense vectors over the index skill vocabulary.
+        role_query: 1 x terms TF-IDF vector of the preferred role, or None (role = default_role).
+        Returns: (rows, base, weighted, exp, role, readiness) with rows ascending.
+        """
+        with self._lock:
+            if self._pool is None:
+                raise RuntimeError("Shard workers are not running")
+            if index is not self._index:
+                self.publish(index)
+            elif index.tombstones != self._tombstones:
+                # Rows were deactivated since the last call (1 byte per row)
+                self._active[:] = index.active[:self._rows]
+                self._tombstones = index.tombstones
+            path, published = self._dir, self._rows
+            bounds = np.linspace(0, published, self.workers + 1).astype(np.int64)
+            futures = [
+                self._pool.submit(_score_shard, path, int(start), int(end), has_skill[:self._skills],
+                                        confidence[:self._skills], exp_by_code, role_query, default_role, k)
+                for start, end in zip(bounds[:-1], bounds[1:]) if end > start
+            ]
+
+        # Rows appended since publishing are scored here
+        heads = []
+        if len(index) > published:
+            tail = np.arange(published, len(index))
+            heads.append(_score_block(
+                published, index.skill_matrix[tail], index.total_weight[tail], index.experience_codes[tail],
+                index.active[tail], index.text_matrix[tail], has_skill, confidence, exp_by_code,
+                role_query, default_role, k
+            ))
+        heads.extend(future.result() for future in futures)
+        return _merge(heads, k)
+
+    def reset(self):
+        """Drops the published arrays; the next score() publishes the index again."""
+        with self._lock:
+            if self._dir:
+                shutil.rmtree(self._dir, ignore_errors=True)
+                self._dir = None
+            self._index = self._active = None
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+        self.reset()
+
+
+def _attach(path):
+    """Memory-maps the arrays of a published generation (cached per worker)."""
+    arrays = _attached.get(path)
+    if arrays is None:
+        _attached.clear()
+        arrays = _attached[path] = {
+            name: load_array(os.path.join(path, name + '.npy')) for name in SHARED_ARRAYS
+        }
+    return arrays
+
+
+def _block(arrays, prefix, start, end, columns):
+    indptr = np.asarray(arrays[prefix + '_indptr'][start:end + 1])
+    lo, hi = indptr[0], indptr[-1]
+    return sparse.csr_matrix(
+        (arrays[prefix + '_data'][lo:hi], arrays[prefix + '_indices'][lo:hi], indptr - lo),
+        shape=(end - start, columns)
+    )
+
+
+def _score_shard(path, start, end, has_skill, confidence, exp_by_code, role_query, default_role, k):
+    """Worker entry point: scores rows [start, end) of a published generation."""
+    arrays = _attach(path)
+    terms = role_query.shape[1] if role_query is not None else 0
+    text = _block(arrays, 'text', start, end, terms) if role_query is not None else None
+    return _score_block(
+        start, _block(arrays, 'skill', start, end, len(has_skill)), arrays['total_weight'][start:end],
+        arrays['experience_codes'][start:end], arrays['active'][start:end], text,
+        has_skill, confidence, exp_by_code, role_query, default_role, k
+    )
+
+
+def _score_block(start, skills, total_weight, codes, active, text, has_skill, confidence,
+                 exp_by_code, role_query, default_role, k):
+    """
+    Same formulas as CareerMatcher._pool, applied to every row of a block.
+    Returns the block's top-k as (rows, base, weighted, exp, role, readiness, display).
+    """
+    from matcher import CareerMatcher
+    from ml_engine import MLMatcher
+
+    rows = np.flatnonzero(active)
+    skills = skills[rows]
+    base, weighted = CareerMatcher._skill_scores(np.asarray(total_weight)[rows], skills @ has_skill, skills @ confidence)
+    exp = exp_by_code[np.asarray(codes)[rows]]
+    if role_query is not None and text.shape[1]:
+        role = CareerMatcher._role_from_text(text[rows], role_query)
+    else:
+        role = np.full(len(rows), default_role)
+    if not _models:
+        _models.append(MLMatcher())
+    readiness = _models[0].predict_batch(weighted, exp, role)
+    display = CareerMatcher._display_scores(readiness)
+
+    keep = np.sort(CareerMatcher._rank(display, k))
+    return (rows[keep] + start, base[keep], weighted[keep], exp[keep], role[keep], readiness[keep], display[keep])
+
+
+def _merge(heads, k):
+    """Merges per-shard heads into the overall top-k, rows ascending."""
+    columns = [np.concatenate(column) for column in zip(*heads)]
+    rows, display = columns[0], columns[-1]
+    order = np.lexsort((rows, -display))[:k]
+    order = order[np.argsort(rows[order])]
+    return tuple(column[order] for column in columns[:-1])
@@ -0,0 +1,129 @@
+import re
+from collections import Counter
+from functools import lru_cache
+import numpy as np
+
+# Role clusters by job title keywords (first match wins)
+ROLE_CLUSTERS = [
+    ('Data and Analytics', r'\b(data|analyst|analytics|machine learning|scientist|bi)\b'),
+    ('Software Engineering', r'\b(engineer|engineering|developer|software|programmer|devops|architect)\b'),
+    ('Design', r'\b(design|designer|ux|ui|ui/ux)\b'),
+    ('Product Management', r'\b(product)\b'),
+    ('Project Management', r'\b(project|program|scrum)\b'),
+    ('Marketing', r'\b(marketing|seo|content|brand)\b'),
+    ('Sales', r'\b(sales|account executive|business development)\b'),
+    ('Finance', r'\b(financial|finance|accountant|accounting)\b'),
+    ('Human Resources', r'\b(hr|human resources|recruiter|recruiting|talent)\b'),
+]
+OTHER_CLUSTER = 'Other'
+CLUSTER_NAMES = [name for name, _ in ROLE_CLUSTERS] + [OTHER_CLUSTER]
+_CLUSTER_PATTERNS = [re.compile(pattern) for _, pattern in ROLE_CLUSTERS]
+
+
+@lru_cache(maxsize=4096)
+def role_cluster(title):
+    """Role cluster of a job title (see ROLE_CLUSTERS)."""
+    title = str(title or '').lower()
+    for (name, _), pattern in zip(ROLE_CLUSTERS, _CLUSTER_PATTERNS):
+        if pattern.search(title):
+            return name
+    return OTHER_CLUSTER
+
+
+class SkillDemand:
+    """
+    How many active jobs require each skill: overall, per role cluster, per experience
+    level code and per (cluster, level code) pair, plus the number of jobs in each slice
+    (for shares).
+    Built once from a JobIndex (vectorized) and then kept up to date with add()/remove().
+    """
+    def __init__(self):
+        self.jobs = 0
+        self.counts = Counter()
+        self.cluster_jobs = Counter()
+        self.cluster_counts = {}
+        self.level_jobs = Counter()
+        self.level_counts = {}
+        self.pair_jobs = Counter()
+        self.pair_counts = {}
+
+    @classmethod
+    def from_index(cls, index):
+        demand = cls()
+        rows = index.active_rows()
+        if len(rows) == 0:
+            return demand
+        clusters = np.array([CLUSTER_NAMES.index(role_cluster(t)) for t in np.asarray(index.columns['title'], dtype=object)[rows]],
+                            dtype=np.int64)
+        codes = index.experience_codes[rows].astype(np.int64)
+        width = int(codes.max()) + 1
+        pairs = clusters * width + codes
+
+        # One entry per (active job, required skill)
+        matrix = index.skill_matrix[rows]
+        entry_rows = np.repeat(np.arange(len(rows)), np.diff(matrix.indptr))
+        skills = matrix.indices.astype(np.int64)
+        n_skills = len(index.skill_names)
+
+        demand.jobs = len(rows)
+        demand.counts = _counter(np.bincount(skills, minlength=n_skills), index.skill_names)
+        slices = (
+            (clusters, demand.cluster_jobs, demand.cluster_counts, lambda v: CLUSTER_NAMES[v]),
+            (codes, demand.level_jobs, demand.level_counts, int),
+            (pairs, demand.pair_jobs, demand.pair_counts, lambda v: (CLUSTER_NAMES[v // width], int(v % width))),
+        )
+        for key, jobs, table, name in slices:
+            entry_keys = key[entry_rows]
+            for value, count in zip(*np.unique(key, return_counts=True)):
+                jobs[name(value)] = int(count)
+                counts = np.bincount(skills[entry_keys == value], minlength=n_skills)
+                table[name(value)] = _counter(counts, index.skill_names)
+        return demand
+
+    def add(self, skills, cluster, level, sign=1):
+        """Counts one job (its normalized skills, role cluster and level code)."""
+        self.jobs += sign
+        self.cluster_jobs[cluster] += sign
+        self.level_jobs[level] += sign
+        self.pair_jobs[(cluster, level)] += sign
+        cluster_counts = self.cluster_counts.setdefault(cluster, Counter())
+        level_counts = self.level_counts.setdefault(level, Counter())
+        pair_counts = self.pair_counts.setdefault((cluster, level), Counter())
+        for skill in skills:
+            self.counts[skill] += sign
+            cluster_counts[skill] += sign
+            level_counts[skill] += sign
+            pair_counts[skill] += sign
+
+    def remove(self, skills, cluster, level):
+        self.add(skills, cluster, level, sign=-1)
+
+    def _slice(self, cluster=None, level=None):
+        if cluster is not None and level is not None:
+            return self.pair_counts.get((cluster, level), Counter()), self.pair_jobs.get((cluster, level), 0)
+        if cluster is not None:
+            return self.cluster_counts.get(cluster, Counter()), self.cluster_jobs.get(cluster, 0)
+        if level is not None:
+            return self.level_counts.get(level, Counter()), self.level_jobs.get(level, 0)
+        return self.counts, self.jobs
+
+    def job_count(self, cluster=None, level=None):
+        return self._slice(cluster, level)[1]
+
+    def count(self, skill, cluster=None, level=None):
+        return self._slice(cluster, level)[0].get(skill, 0)
+
+    def share(self, skill, cluster=None, level=None):
+        """Fraction of jobs (in the slice) requiring a skill."""
+        counts, jobs = self._slice(cluster, level)
+        return counts.get(skill, 0) / jobs if jobs else 0.0
+
+    def top(self, n=20, cluster=None, level=None):
+        """Most demanded skills in a slice: [{skill, count, share}]."""
+        counts, jobs = self._slice(cluster, level)
+        ranked = sorted(((c, s) for s, c in counts.items() if c > 0), key=lambda item: (-item[0], item[1]))
+        return [{'skill': s, 'count': c, 'share': round(c / jobs, 4) if jobs else 0.0} for c, s in ranked[:n]]
+
+
+def _counter(counts, names):
+    return Counter({names[k]: int(counts[k]) for k in np.flatnonzero(counts)})
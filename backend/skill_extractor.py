@@ -0,0 +1,92 @@
+import re
+
+# Canonical skill -> lowercase phrases that signal it
+SKILL_KEYWORDS = {
+    'Python': ['python'],
+    'Java': ['java', 'jvm'],
+    'JavaScript': ['javascript', 'js', 'es6'],
+    'React': ['react', 'reactjs'],
+    'Node.js': ['node.js', 'nodejs', 'node'],
+    'SQL': ['sql', 'mysql', 'postgresql', 'postgres'],
+    'AWS': ['aws', 'amazon web services'],
+    'Docker': ['docker', 'container'],
+    'Kubernetes': ['kubernetes', 'k8s'],
+    'Machine Learning': ['machine learning', 'ml', 'ai'],
+    'Data Analysis': ['data analysis', 'analytics'],
+    'Go': ['golang', 'go lang'],
+    'Rust': ['rust'],
+    'C++': ['c++'],
+    'Git': ['git', 'github'],
+    'Agile': ['agile', 'scrum'],
+    'Communication': ['communication', 'verbal', 'written'],
+    'Teamwork': ['teamwork', 'collaboration'],
+    'Figma': ['figma', 'sketch'],
+    'Marketing': ['marketing', 'seo', 'sem'],
+    'Sales': ['sales', 'selling']
+}
+
+
+class SkillExtractor:
+    """
+    Keyword skill extraction in a single regex pass per document.
+
+    All phrases are compiled into one alternation, longest first, so at any position the
+    longest phrase wins. Phrases must not touch a word character on either side, which
+    also holds for phrases ending in symbols such as 'c++'. A phrase nested in a longer
+    one at its own boundaries (e.g. 'js' in 'node.js') is consumed by the longer match,
+    so its skill is attached to the longer phrase when compiling.
+    """
+    def __init__(self, keywords=SKILL_KEYWORDS):
+        self.skills = list(keywords)
+        skill_of = {}
+        for skill, phrases in keywords.items():
+            for phrase in phrases:
+                skill_of.setdefault(phrase.lower(), skill)
+        self._skills_of = {phrase: {skill} | _nested_skills(phrase, skill_of) for phrase, skill in skill_of.items()}
+        alternation = '|'.join(re.escape(p) for p in sorted(skill_of, key=lambda p: (-len(p), p)))
+        self._pattern = re.compile(r'(?<!\w)(?:' + alternation + r')(?!\w)')
+        self._order = {skill: i for i, skill in enumerate(self.skills)}
+
+    def extract(self, text, fallback=True):
+        """Skills mentioned in a text (vocabulary order); see context_fallback for empty results."""
+        text_lower = (text or '').lower()
+        found = set()
+        for phrase in set(self._pattern.findall(text_lower)):
+            found |= self._skills_of[phrase]
+        if not found and fallback:
+            return context_fallback(text_lower)
+        return sorted(found, key=self._order.get)
+
+    def extract_many(self, texts, fallback=True):
+        """extract() for a list of texts."""
+        return [self.extract(text, fallback) for text in texts]
+
+
+def _nested_skills(phrase, skill_of):
+    """Skills of other phrases found inside `phrase` at word boundaries, after its first character."""
+    nested = set()
+    for start in range(1, len(phrase)):
+        if phrase[start - 1].isalnum() or phrase[start - 1] == '_':
+            continue
+        for other, skill in skill_of.items():
+            end = start + len(other)
+            if phrase.startswith(other, start) and (end == len(phrase) or not (phrase[end].isalnum() or phrase[end] == '_')):
+                nested.add(skill)
+    return nested
+
+
+def context_fallback(text_lower):
+    """Generic skills guessed from context when no keyword matched."""
+    if 'software' in text_lower or 'developer' in text_lower:
+        return ['Software Engineering', 'Git']
+    elif 'design' in text_lower:
+        return ['Design', 'Figma']
+    elif 'data' in text_lower:
+        return ['Data Analysis', 'SQL']
+    return ['Communication', 'Teamwork']
+
+
+# Shared instance (the vocabulary is compiled once per process)
+skill_extractor = SkillExtractor()
+extract_skills = skill_extractor.extract
+extract_skills_many = skill_extractor.extract_many
@@ -0,0 +1,129 @@
+import os
+import threading
+import time
+from contextvars import ContextVar
+
+# Histogram bucket upper bounds in milliseconds (the last bucket is unbounded)
+BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class StageTimings:
+    """
+    Lightweight timing spans for pipeline stages:
+
+        with timings.span('match.score'):
+            ...
+
+    When enabled, span durations are aggregated into per-stage histograms (snapshot()).
+    Independently, collect() / finish() capture the spans of the current request or thread
+    only, e.g. for a debug response header. With both off, span() returns a shared no-op
+    context manager.
+    """
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self._stages = {}   # stage -> {'count', 'sum', 'max', 'buckets'}
+        self._lock = threading.Lock()
+        self._collected = ContextVar('stage_timings', default=None)
+
+    def span(self, stage):
+        if not self.enabled and self._collected.get() is None:
+            return _NOOP
+        return _Span(self, stage)
+
+    def record(self, stage, seconds):
+        ms = seconds * 1000
+        collected = self._collected.get()
+        if collected is not None:
+            collected.append((stage, ms))
+        if not self.enabled:
+            return
+        with self._lock:
+            entry = self._stages.get(stage)
+            if entry is None:
+                entry = self._stages[stage] = {'count': 0, 'sum': 0.0, 'max': 0.0, 'buckets': [0] * (len(BUCKETS_MS) + 1)}
+            entry['count'] += 1
+            entry['sum'] += ms
+            entry['max'] = max(entry['max'], ms)
+            entry['buckets'][_bucket(ms)] += 1
+
+    def collect(self):
+        """Starts capturing the spans of the current context. Returns a token for finish()."""
+        return self._collected.set([])
+
+    def finish(self, token):
+        """Stops capturing and returns the captured [(stage, ms)] in completion order."""
+        collected = self._collected.get() or []
+        self._collected.reset(token)
+        return collected
+
+    def snapshot(self):
+        """{stage: {count, sum_ms, mean_ms, max_ms, buckets: [[upper bound ms, cumulative count], ...]}}"""
+        with self._lock:
+            stages = {stage: dict(entry, buckets=list(entry['buckets'])) for stage, entry in self._stages.items()}
+        result = {}
+        for stage, entry in sorted(stages.items()):
+            cumulative, buckets = 0, []
+            for bound, count in zip(BUCKETS_MS + ('+Inf',), entry['buckets']):
+                cumulative += count
+                buckets.append([bound, cumulative])
+            result[stage] = {
+                'count': entry['count'],
+                'sum_ms': round(entry['sum'], 3),
+                'mean_ms': round(entry['sum'] / entry['count'], 3),
+                'max_ms': round(entry['max'], 3),
+                'buckets': buckets
+            }
+        return result
+
+    def reset(self):
+        with self._lock:
+            self._stages.clear()
+
+
+class _Span:
+    __slots__ = ('timings', 'stage', 'start')
+
+    def __init__(self, timings, stage):
+        self.timings = timings
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.timings.record(self.stage, time.perf_counter() - self.start)
+        return False
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+def _bucket(ms):
+    for i, bound in enumerate(BUCKETS_MS):
+        if ms <= bound:
+            return i
+    return len(BUCKETS_MS)
+
+
+def server_timing_header(spans):
+    """[(stage, ms)] -> Server-Timing header value (stages repeated within a request are summed)."""
+    totals = {}
+    for stage, ms in spans:
+        totals[stage] = totals.get(stage, 0.0) + ms
+    return ', '.join(f"{stage};dur={ms:.2f}" for stage, ms in totals.items())
+
+
+# Process-wide instance; histograms are on with PATHWAY_TIMINGS=1
+timings = StageTimings(enabled=os.getenv('PATHWAY_TIMINGS', '0').lower() in ('1', 'true', 'yes'))
+span = timings.span